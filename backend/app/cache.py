@@ -0,0 +1,120 @@
+"""
+ABM Reporter - Response Cache
+Redis-backed caching with stale-while-revalidate for expensive aggregate calls
+"""
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional, Set
+
+import orjson
+from aiocache import Cache
+from aiocache.serializers import BaseSerializer
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ORJSONSerializer(BaseSerializer):
+    """Serialize cached values with orjson"""
+
+    DEFAULT_ENCODING = None  # orjson works in bytes
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, value: Optional[bytes]) -> Any:
+        return None if value is None else orjson.loads(value)
+
+
+_cache: Optional[Cache] = None
+# Background refreshes in flight, keyed by cache key; also keeps the tasks referenced
+_refreshing: Set[str] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+def get_cache() -> Cache:
+    """Get or create the shared Redis cache"""
+    global _cache
+    if _cache is None:
+        _cache = Cache.from_url(get_settings().REDIS_URL)
+        _cache.serializer = ORJSONSerializer()
+    return _cache
+
+
+async def close_cache():
+    """Close the shared Redis cache connection"""
+    global _cache
+    if _cache is not None:
+        await _cache.close()
+        _cache = None
+
+
+async def _store(key: str, value: Any, ttl: int, stale: int):
+    """Store a value that is fresh for ttl seconds and servable stale for a further stale seconds"""
+    # Empty results aren't stored, so a swallowed upstream error isn't served for the whole window
+    if not value:
+        return
+    try:
+        await get_cache().set(key, {'stale_at': time.time() + ttl, 'body': value}, ttl=ttl + stale)
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+
+async def _refresh(key: str, fetch: Callable[[], Awaitable[Any]], ttl: int, stale: int):
+    """Re-run fetch and store its result, logging rather than raising failures"""
+    try:
+        await _store(key, await fetch(), ttl, stale)
+    except Exception as e:
+        logger.warning(f"Background refresh failed for {key}: {e}")
+    finally:
+        _refreshing.discard(key)
+
+
+def cached(key: str, ttl: int, stale: int = 0):
+    """
+    Cache an async method's result in Redis under key (plus any call arguments)
+    Fresh entries are returned as-is; stale ones are returned while a background task refreshes them
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            cache_key = key
+            if args or kwargs:
+                cache_key = f"{key}:{args}:{sorted(kwargs.items())}"
+
+            try:
+                entry = await get_cache().get(cache_key)
+            except Exception as e:
+                logger.warning(f"Cache read failed for {cache_key}: {e}")
+                entry = None
+
+            if entry is not None:
+                if time.time() >= entry['stale_at'] and cache_key not in _refreshing:
+                    _refreshing.add(cache_key)
+                    task = asyncio.create_task(
+                        _refresh(cache_key, lambda: func(self, *args, **kwargs), ttl, stale)
+                    )
+                    _refresh_tasks.add(task)
+                    task.add_done_callback(_refresh_tasks.discard)
+                return entry['body']
+
+            result = await func(self, *args, **kwargs)
+            await _store(cache_key, result, ttl, stale)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+async def invalidate(*keys: str):
+    """Drop cached entries so the next call fetches fresh data"""
+    cache = get_cache()
+    for key in keys:
+        try:
+            await cache.delete(key)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {key}: {e}")
@@ -54,6 +54,7 @@ class Settings(BaseSettings):
 
     # Cache settings
     CACHE_TTL_SECONDS: int = 300  # 5 minutes default
+    CSV_CACHE_DIR: Optional[str] = None  # defaults to a directory under the system temp dir
 
     class Config:
         env_file = ".env"
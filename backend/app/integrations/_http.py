@@ -0,0 +1,196 @@
+"""
+ABM Reporter - Shared HTTP Client
+Pooled HTTP/2 transport with response caching and retries for REST integrations
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Any
+import httpx
+import orjson
+from aiocache import Cache
+from tenacity import (
+    RetryCallState,
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+from ..cache import ORJSONSerializer
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Rate limiting and transient upstream failures
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Statuses where the server may say how long to back off
+RETRY_AFTER_STATUS_CODES = frozenset({429, 503})
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+_backoff = wait_exponential_jitter(initial=1, max=10)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry throttled/5xx responses and connection-level failures"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _wait_for_retry(retry_state: RetryCallState) -> float:
+    """Honour Retry-After on throttling responses, otherwise back off exponentially with jitter"""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in RETRY_AFTER_STATUS_CODES:
+        retry_after = _parse_retry_after(exc.response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER_SECONDS)
+    return _backoff(retry_state)
+
+
+class BaseAPIClient:
+    """Base API client with a pooled connection, Redis-cached GETs and retries"""
+
+    BASE_URL = ""
+    SERVICE_NAME = "API"
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._headers: Dict[str, str] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._response_cache = Cache.from_url(self.settings.REDIS_URL)
+        self._response_cache.serializer = ORJSONSerializer()
+        # GETs currently on the wire, so concurrent identical calls share one request
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_headers(self) -> Dict[str, str]:
+        """Get authentication headers"""
+        return self._headers
+
+    def _client_or_new(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                headers=self._get_headers()
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled HTTP client and cache connection"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        await self._response_cache.close()
+
+    async def invalidate_cache(self):
+        """Drop this client's cached GET responses so the next calls hit the API"""
+        try:
+            # Response keys are prefixed with the class name, see _make_request
+            await self._response_cache.clear(namespace=self.__class__.__name__)
+        except Exception as e:
+            logger.warning(f"{self.SERVICE_NAME} cache invalidation failed: {e}")
+
+    async def _make_request(
+            self,
+            method: str,
+            endpoint: str,
+            params: Optional[Dict] = None,
+            json_data: Optional[Dict] = None,
+            headers: Optional[Dict[str, str]] = None,
+            cache_ttl: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Make authenticated request to the API, serving GETs from Redis when cached"""
+        if method != "GET":
+            return await self._send(method, endpoint, params, json_data, headers)
+
+        cache_key = f"{self.__class__.__name__}:{endpoint}:{sorted((params or {}).items())}"
+        pending = self._inflight.get(cache_key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._cached_get(cache_key, endpoint, params, headers, cache_ttl)
+            )
+            self._inflight[cache_key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        # Shield so one cancelled caller doesn't cancel the request for the others
+        return await asyncio.shield(pending)
+
+    async def _cached_get(
+            self,
+            cache_key: str,
+            endpoint: str,
+            params: Optional[Dict] = None,
+            headers: Optional[Dict[str, str]] = None,
+            cache_ttl: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Serve a GET from Redis, falling back to the API and caching the result"""
+        try:
+            cached = await self._response_cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"{self.SERVICE_NAME} cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+
+        result = await self._send("GET", endpoint, params, None, headers)
+        ttl = self.settings.CACHE_TTL_SECONDS if cache_ttl is None else cache_ttl
+        try:
+            await self._response_cache.set(cache_key, result, ttl=ttl)
+        except Exception as e:
+            logger.warning(f"{self.SERVICE_NAME} cache write failed: {e}")
+        return result
+
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        wait=_wait_for_retry,
+        stop=stop_after_attempt(4),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True
+    )
+    async def _send(
+            self,
+            method: str,
+            endpoint: str,
+            params: Optional[Dict] = None,
+            json_data: Optional[Dict] = None,
+            headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Send a request over the pooled client, retrying transient failures"""
+        try:
+            response = await self._client_or_new().request(
+                method=method,
+                url=endpoint,
+                params=params,
+                headers=headers,
+                content=orjson.dumps(json_data) if json_data is not None else None
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"{self.SERVICE_NAME} API error: {e.response.status_code} - {e.response.text}")
+            raise
+        except Exception as e:
+            logger.error(f"{self.SERVICE_NAME} request error: {e}")
+            raise
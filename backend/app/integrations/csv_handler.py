@@ -2,14 +2,37 @@
 ABM Reporter - CSV Upload Handler
 Handles CSV imports from platforms without direct API access (e.g., Fibbler)
 """
+import csv
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, List, Dict, Any, Optional
 from datetime import datetime
 import pandas as pd
-from io import StringIO, BytesIO
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from io import BytesIO
+
+from ..config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# pyarrow tokenizes blocks in parallel across cores
+_READ_OPTIONS = pacsv.ReadOptions(use_threads=True, block_size=8 << 20)
+_CONVERT_OPTIONS = pacsv.ConvertOptions(strings_can_be_null=True)
+# Smaller blocks for the streaming reader keep peak memory at one batch
+_STREAM_READ_OPTIONS = pacsv.ReadOptions(block_size=4 << 20)
+
+# Thousands separators, percent/currency signs and padding in exported numbers
+_NUMERIC_NOISE_PATTERN = r'[,%$\s]'
+
+# Non-negative counters that fit in narrow unsigned integer dtypes
+_COUNT_COLUMNS = ('impressions', 'engagements', 'clicks')
+
 
 class CSVHandler:
     """Handler for CSV data imports"""
@@ -35,50 +58,151 @@ class CSVHandler:
     }
 
     def __init__(self):
-        self._cached_data: Dict[str, pd.DataFrame] = {}
-
-    def parse_fibbler_csv(self, csv_content: str | bytes) -> List[Dict[str, Any]]:
+        settings = get_settings()
+        self._cache_dir = Path(settings.CSV_CACHE_DIR or Path(tempfile.gettempdir()) / 'abm_reporter_csv')
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._cache_ttl = settings.CACHE_TTL_SECONDS
+
+    @staticmethod
+    def _as_stream(csv_content: str | bytes | BinaryIO) -> BinaryIO:
+        """Wrap CSV content in a binary stream for pyarrow; file objects are read as-is"""
+        if not isinstance(csv_content, (str, bytes)):
+            return csv_content
+        if isinstance(csv_content, str):
+            csv_content = csv_content.encode('utf-8')
+        return BytesIO(csv_content)
+
+    @staticmethod
+    def _peek_header(stream: BinaryIO) -> List[str]:
+        """Read the CSV header row, leaving the stream where it was"""
+        pos = stream.tell()
+        header = stream.readline()
+        stream.seek(pos)
+        return next(csv.reader([header.decode('utf-8-sig')]), [])
+
+    def _map_fibbler_columns(self, columns: List[str]) -> List[str]:
+        """Map Fibbler export headers onto our column names"""
+        # Normalize column names
+        columns = [col.lower().strip() for col in columns]
+
+        # Try to map columns
+        column_mapping = {}
+        for orig, mapped in self.FIBBLER_COLUMNS.items():
+            for col in columns:
+                if orig.lower() in col.lower():
+                    column_mapping[col] = mapped
+                    break
+
+        return [column_mapping.get(col, col) for col in columns]
+
+    def _read_table(self, csv_content: str | bytes | BinaryIO) -> pa.Table:
+        """Read CSV content into an Arrow table"""
+        return pacsv.read_csv(
+            self._as_stream(csv_content),
+            read_options=_READ_OPTIONS,
+            convert_options=_CONVERT_OPTIONS
+        )
+
+    @staticmethod
+    def _strip_numeric_noise(table: pa.Table, column: str) -> pa.Table:
+        """Strip number formatting from a string column in a single Arrow pass"""
+        idx = table.schema.get_field_index(column)
+        values = table.column(idx)
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            values = pc.replace_substring_regex(values, _NUMERIC_NOISE_PATTERN, '')
+            table = table.set_column(idx, column, values)
+        return table
+
+    @staticmethod
+    def _strip_count_noise(table: pa.Table, column: str) -> pa.Table:
+        """Strip number formatting from a count column, reading it as strings whatever type Arrow inferred"""
+        idx = table.schema.get_field_index(column)
+        values = pc.replace_substring_regex(table.column(idx).cast(pa.string()), _NUMERIC_NOISE_PATTERN, '')
+        return table.set_column(idx, column, values)
+
+    @staticmethod
+    def _downcast_counts(df: pd.DataFrame) -> pd.DataFrame:
+        """Fill missing counts with 0 and shrink them to the narrowest unsigned dtype"""
+        for col in _COUNT_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col].fillna(0), downcast='unsigned')
+        return df
+
+    @staticmethod
+    def _aggregate_groups(df: pd.DataFrame, group_col: str, agg_spec: Dict[str, str]) -> pd.DataFrame:
+        """Hash-aggregate a frame by group column using pandas' Cython kernels"""
+        # Categorical keys hash as integer codes instead of Python strings
+        df[group_col] = df[group_col].astype('category')
+        groups = df.groupby(group_col, sort=False, as_index=False, observed=True)
+        if not agg_spec:
+            return groups.size()[[group_col]]
+        return groups.agg(agg_spec)
+
+    def parse_fibbler_csv(self, csv_content: str | bytes | BinaryIO) -> List[Dict[str, Any]]:
         """
         Parse Fibbler CSV export
         Fibbler provides LinkedIn engagement data by company
         """
         try:
-            if isinstance(csv_content, bytes):
-                df = pd.read_csv(BytesIO(csv_content))
-            else:
-                df = pd.read_csv(StringIO(csv_content))
-
-            # Normalize column names
-            df.columns = df.columns.str.lower().str.strip()
-
-            # Try to map columns
-            column_mapping = {}
-            for orig, mapped in self.FIBBLER_COLUMNS.items():
-                for col in df.columns:
-                    if orig.lower() in col.lower():
-                        column_mapping[col] = mapped
-                        break
-
-            if column_mapping:
-                df = df.rename(columns=column_mapping)
+            stream = self._as_stream(csv_content)
+
+            # The streaming reader types columns from the first block only, so a formatted count
+            # in a later block would fail the whole upload; read counts as strings and clean per batch
+            header = self._peek_header(stream)
+            count_types = {
+                col: pa.string()
+                for col, mapped in zip(header, self._map_fibbler_columns(header))
+                if mapped in _COUNT_COLUMNS
+            }
+            reader = pacsv.open_csv(
+                stream,
+                read_options=_STREAM_READ_OPTIONS,
+                convert_options=pacsv.ConvertOptions(column_types=count_types, strings_can_be_null=True)
+            )
+
+            names = self._map_fibbler_columns(reader.schema.names)
 
             # Group by account/domain
             grouped_data = []
-            if 'account_name' in df.columns or 'domain' in df.columns:
-                group_col = 'account_name' if 'account_name' in df.columns else 'domain'
-
-                for name, group in df.groupby(group_col):
-                    record = {
-                        'account_name': name,
-                        'domain': group['domain'].iloc[0] if 'domain' in group.columns else None,
-                        'impressions': group['impressions'].sum() if 'impressions' in group.columns else 0,
-                        'engagements': group['engagements'].sum() if 'engagements' in group.columns else 0,
-                        'clicks': group['clicks'].sum() if 'clicks' in group.columns else 0
-                    }
-                    grouped_data.append(record)
+            if 'account_name' in names or 'domain' in names:
+                group_col = 'account_name' if 'account_name' in names else 'domain'
+                agg_spec = {col: 'sum' for col in _COUNT_COLUMNS if col in names}
+                if 'domain' in names and group_col != 'domain':
+                    agg_spec['domain'] = 'first'
+
+                # Aggregate each record batch, then reduce the partial results
+                partials = []
+                for batch in reader:
+                    table = pa.Table.from_batches([batch]).rename_columns(names)
+                    # Drop thousands separators etc. so formatted counts parse instead of coercing to NaN
+                    for col in agg_spec:
+                        if col != 'domain':
+                            table = self._strip_count_noise(table, col)
+                    df = table.to_pandas()
+                    for col in agg_spec:
+                        if col != 'domain':
+                            df[col] = pd.to_numeric(df[col], errors='coerce', downcast='unsigned')
+                    partials.append(self._aggregate_groups(df, group_col, agg_spec))
+
+                if partials:
+                    grouped = self._aggregate_groups(
+                        pd.concat(partials, ignore_index=True), group_col, agg_spec
+                    )
+                    grouped['account_name'] = grouped[group_col]
+                    if 'domain' not in grouped.columns:
+                        grouped['domain'] = None
+                    for col in _COUNT_COLUMNS:
+                        if col not in grouped.columns:
+                            grouped[col] = 0
+                    grouped = self._downcast_counts(grouped)
+
+                    grouped_data = grouped[
+                        ['account_name', 'domain', 'impressions', 'engagements', 'clicks']
+                    ].to_dict('records')
             else:
                 # Return raw data if can't group
-                grouped_data = df.to_dict('records')
+                table = pa.Table.from_batches(list(reader), schema=reader.schema)
+                grouped_data = table.rename_columns(names).to_pandas().to_dict('records')
 
             logger.info(f"Parsed {len(grouped_data)} accounts from Fibbler CSV")
             return grouped_data
@@ -87,36 +211,30 @@ class CSVHandler:
             logger.error(f"Error parsing Fibbler CSV: {e}")
             raise ValueError(f"Failed to parse Fibbler CSV: {e}")
 
-    def parse_linkedin_ads_csv(self, csv_content: str | bytes) -> List[Dict[str, Any]]:
+    def parse_linkedin_ads_csv(self, csv_content: str | bytes | BinaryIO) -> List[Dict[str, Any]]:
         """
         Parse LinkedIn Ads CSV export
         """
         try:
-            if isinstance(csv_content, bytes):
-                df = pd.read_csv(BytesIO(csv_content))
-            else:
-                df = pd.read_csv(StringIO(csv_content))
+            table = self._read_table(csv_content)
 
             # Map columns
-            column_mapping = {}
-            for orig, mapped in self.LINKEDIN_EXPORT_COLUMNS.items():
-                if orig in df.columns:
-                    column_mapping[orig] = mapped
-
-            if column_mapping:
-                df = df.rename(columns=column_mapping)
-
-            # Clean numeric columns
-            for col in ['impressions', 'clicks', 'spend']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
-
-            # Clean percentage columns
-            if 'engagement_rate' in df.columns:
-                df['engagement_rate'] = pd.to_numeric(
-                    df['engagement_rate'].astype(str).str.replace('%', ''),
-                    errors='coerce'
-                ).fillna(0)
+            table = table.rename_columns([
+                self.LINKEDIN_EXPORT_COLUMNS.get(col, col) for col in table.column_names
+            ])
+
+            # Clean numeric and percentage columns
+            numeric_columns = [
+                col for col in ('impressions', 'clicks', 'spend', 'engagement_rate')
+                if col in table.column_names
+            ]
+            for col in numeric_columns:
+                table = self._strip_numeric_noise(table, col)
+
+            df = table.to_pandas()
+            for col in numeric_columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            df = self._downcast_counts(df)
 
             records = df.to_dict('records')
             logger.info(f"Parsed {len(records)} records from LinkedIn Ads CSV")
@@ -126,16 +244,13 @@ class CSVHandler:
             logger.error(f"Error parsing LinkedIn Ads CSV: {e}")
             raise ValueError(f"Failed to parse LinkedIn Ads CSV: {e}")
 
-    def parse_generic_csv(self, csv_content: str | bytes) -> pd.DataFrame:
+    def parse_generic_csv(self, csv_content: str | bytes | BinaryIO) -> pd.DataFrame:
         """
         Parse generic CSV and return DataFrame
         Useful for custom data imports
         """
         try:
-            if isinstance(csv_content, bytes):
-                df = pd.read_csv(BytesIO(csv_content))
-            else:
-                df = pd.read_csv(StringIO(csv_content))
+            df = self._read_table(csv_content).to_pandas()
 
             logger.info(f"Parsed CSV with {len(df)} rows and columns: {list(df.columns)}")
             return df
@@ -154,33 +269,35 @@ class CSVHandler:
         Merge CSV data with existing account data
         Matches on domain or account name
         """
-        # Create lookup from CSV data
-        csv_lookup = {}
-        for record in csv_data:
-            key = record.get(match_field, '').lower() if record.get(match_field) else None
-            if key:
-                csv_lookup[key] = record
-
-        # Merge with accounts
+        # Key CSV rows by position; the last row wins for a duplicated key
+        csv_keys = pd.DataFrame({
+            'key': pd.Series([record.get(match_field) or None for record in csv_data], dtype=object).str.lower(),
+            'csv_pos': range(len(csv_data))
+        }).dropna().drop_duplicates('key', keep='last')
+
+        # One candidate key per account domain, in the account's own order
+        if match_field == 'domain':
+            account_keys = pd.Series(
+                [[d] if isinstance(d, str) else (d or []) for d in (a.get('domains') for a in accounts)],
+                dtype=object
+            ).explode()
+        else:
+            account_keys = pd.Series([account.get(match_field) for account in accounts], dtype=object)
+        account_keys = account_keys.str.lower().rename('key').rename_axis('account_pos').reset_index()
+        account_keys = account_keys[account_keys['key'].notna() & (account_keys['key'] != '')]
+
+        # Hash-join both sides and keep the first CSV hit per account
+        matches = account_keys.merge(csv_keys, on='key', how='inner').drop_duplicates('account_pos')
+        csv_matches = dict(zip(matches['account_pos'], matches['csv_pos']))
+
         merged = []
-        for account in accounts:
-            account_key = None
-            if match_field == 'domain':
-                # Try matching any domain
-                domains = account.get('domains', [])
-                if isinstance(domains, str):
-                    domains = [domains]
-                for domain in domains:
-                    if domain.lower() in csv_lookup:
-                        account_key = domain.lower()
-                        break
-            else:
-                account_key = account.get(match_field, '').lower()
+        for pos, account in enumerate(accounts):
+            csv_pos = csv_matches.get(pos)
+            csv_record = csv_data[csv_pos] if csv_pos is not None else None
 
             merged_account = account.copy()
-            if account_key and account_key in csv_lookup:
+            if csv_record:
                 # Merge CSV data
-                csv_record = csv_lookup[account_key]
                 for key, value in csv_record.items():
                     if key not in merged_account or merged_account[key] is None:
                         merged_account[key] = value
@@ -189,20 +306,40 @@ class CSVHandler:
 
         return merged
 
+    def _cache_path(self, key: str) -> Path:
+        """Stable on-disk location for a cache key, shared across workers"""
+        return self._cache_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.parquet"
+
     def cache_data(self, key: str, data: pd.DataFrame):
         """Cache parsed data for later use"""
-        self._cached_data[key] = data
+        path = self._cache_path(key)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            data.to_parquet(tmp_path, compression='zstd')
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to cache CSV data for {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
 
     def get_cached_data(self, key: str) -> Optional[pd.DataFrame]:
         """Retrieve cached data"""
-        return self._cached_data.get(key)
+        path = self._cache_path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self._cache_ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return pd.read_parquet(path, memory_map=True)
+        except FileNotFoundError:
+            return None
 
     def clear_cache(self, key: Optional[str] = None):
         """Clear cached data"""
         if key:
-            self._cached_data.pop(key, None)
+            self._cache_path(key).unlink(missing_ok=True)
         else:
-            self._cached_data.clear()
+            for path in self._cache_dir.glob('*.parquet'):
+                path.unlink(missing_ok=True)
 
 
 # Singleton instance
@@ -5,61 +5,29 @@ Handles website session analytics and account identification
 import logging
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timedelta
-import httpx
 
-from ..config import get_settings
 from ..models.account import WebsiteMetrics
+from ._http import BaseAPIClient
 
 logger = logging.getLogger(__name__)
 
 
-class FactorsClient:
+class FactorsClient(BaseAPIClient):
     """Factors.ai API client for website analytics"""
 
     # Note: Factors.ai API endpoint - update based on actual documentation
     BASE_URL = "https://api.factors.ai/v1"
+    SERVICE_NAME = "Factors.ai"
 
     def __init__(self):
-        self.settings = get_settings()
+        super().__init__()
         self._api_key = self.settings.FACTORS_API_KEY
         self._project_id = self.settings.FACTORS_PROJECT_ID
-
-    def _get_headers(self) -> Dict[str, str]:
-        """Get authentication headers"""
-        return {
+        self._headers = {
             "Authorization": f"Bearer {self._api_key}",
             "Content-Type": "application/json"
         }
 
-    async def _make_request(
-            self,
-            method: str,
-            endpoint: str,
-            params: Optional[Dict] = None,
-            json_data: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Make authenticated request to Factors.ai API"""
-        url = f"{self.BASE_URL}{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=self._get_headers(),
-                    params=params,
-                    json=json_data,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Factors.ai API error: {e.response.status_code} - {e.response.text}")
-                raise
-            except Exception as e:
-                logger.error(f"Factors.ai request error: {e}")
-                raise
-
     async def get_identified_accounts(
             self,
             start_date: Optional[datetime] = None,
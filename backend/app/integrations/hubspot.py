@@ -2,62 +2,44 @@
 ABM Reporter - HubSpot Integration
 Handles all HubSpot data fetching for contacts and form submissions
 """
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+from collections import Counter
+from typing import List, Dict, Optional, Any, Callable, Iterator
 from datetime import datetime, timedelta
-import httpx
+from pydantic import TypeAdapter
+
+try:
+    from ciso8601 import parse_datetime as _parse_dt
+except ImportError:
+    _parse_dt = datetime.fromisoformat  # accepts a trailing 'Z' on Python 3.11+
 
-from ..config import get_settings
 from ..models.account import Contact, FormSubmission
+from ._http import BaseAPIClient
 
 logger = logging.getLogger(__name__)
 
+# Built once so validation reuses the compiled core schema; contacts are validated per batch
+_CONTACTS_ADAPTER = TypeAdapter(List[Contact])
+_FORM_SUBMISSION_ADAPTER = TypeAdapter(FormSubmission)
+
 
-class HubSpotClient:
+class HubSpotClient(BaseAPIClient):
     """HubSpot API client for ABM data"""
 
     BASE_URL = "https://api.hubapi.com"
+    SERVICE_NAME = "HubSpot"
+    BATCH_READ_SIZE = 100  # HubSpot's max IDs per batch read
+    BATCH_READ_CONCURRENCY = 4
 
     def __init__(self):
-        self.settings = get_settings()
+        super().__init__()
         self._access_token = self.settings.HUBSPOT_ACCESS_TOKEN
-
-    def _get_headers(self) -> Dict[str, str]:
-        """Get authentication headers"""
-        return {
+        self._headers = {
             "Authorization": f"Bearer {self._access_token}",
             "Content-Type": "application/json"
         }
 
-    async def _make_request(
-            self,
-            method: str,
-            endpoint: str,
-            params: Optional[Dict] = None,
-            json_data: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Make authenticated request to HubSpot API"""
-        url = f"{self.BASE_URL}{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=self._get_headers(),
-                    params=params,
-                    json=json_data,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HubSpot API error: {e.response.status_code} - {e.response.text}")
-                raise
-            except Exception as e:
-                logger.error(f"HubSpot request error: {e}")
-                raise
-
     async def get_companies(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Fetch companies from HubSpot"""
         endpoint = "/crm/v3/objects/companies"
@@ -87,28 +69,42 @@ class HubSpotClient:
             if not contact_ids:
                 return []
 
-            # Batch fetch contact details
-            contacts = []
-            for contact_id in contact_ids:
-                endpoint = f"/crm/v3/objects/contacts/{contact_id}"
-                params = {"properties": "email,firstname,lastname,jobtitle,createdate"}
-
-                contact_data = await self._make_request("GET", endpoint, params=params)
-                props = contact_data.get('properties', {})
-
-                contacts.append(Contact(
-                    id=contact_data['id'],
-                    email=props.get('email'),
-                    first_name=props.get('firstname'),
-                    last_name=props.get('lastname'),
-                    title=props.get('jobtitle'),
-                    source='hubspot',
-                    account_id=company_id,
-                    created_at=datetime.fromisoformat(props['createdate'].replace('Z', '+00:00'))
-                    if props.get('createdate') else None
-                ))
-
-            return contacts
+            # Batch fetch contact details, a few batch calls in flight at once
+            semaphore = asyncio.Semaphore(self.BATCH_READ_CONCURRENCY)
+
+            async def read_batch(ids: List[str]) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._make_request(
+                        "POST",
+                        "/crm/v3/objects/contacts/batch/read",
+                        json_data={
+                            "properties": ["email", "firstname", "lastname", "jobtitle", "createdate"],
+                            "inputs": [{"id": contact_id} for contact_id in ids]
+                        }
+                    )
+
+            batches = await asyncio.gather(*(
+                read_batch(contact_ids[i:i + self.BATCH_READ_SIZE])
+                for i in range(0, len(contact_ids), self.BATCH_READ_SIZE)
+            ))
+
+            rows = []
+            for batch in batches:
+                for contact_data in batch.get('results', []):
+                    props = contact_data.get('properties', {})
+
+                    rows.append({
+                        'id': contact_data['id'],
+                        'email': props.get('email'),
+                        'first_name': props.get('firstname'),
+                        'last_name': props.get('lastname'),
+                        'title': props.get('jobtitle'),
+                        'source': 'hubspot',
+                        'account_id': company_id,
+                        'created_at': _parse_dt(props['createdate']) if props.get('createdate') else None
+                    })
+
+            return _CONTACTS_ADAPTER.validate_python(rows)
         except Exception as e:
             logger.error(f"Error fetching contacts for company {company_id}: {e}")
             raise
@@ -127,45 +123,94 @@ class HubSpotClient:
             "limit": 100
         }
 
-        try:
-            all_contacts = []
-            after = None
-
-            while True:
-                if after:
-                    search_body["after"] = after
-
-                result = await self._make_request("POST", endpoint, json_data=search_body)
-                contacts = result.get('results', [])
-                all_contacts.extend(contacts)
+        # Fetch the next page while the previous one is being counted
+        pages: asyncio.Queue = asyncio.Queue(maxsize=2)
 
-                # Check for pagination
-                paging = result.get('paging', {})
-                next_page = paging.get('next', {})
-                after = next_page.get('after')
-
-                if not after or len(contacts) < 100:
-                    break
+        async def fetch_pages():
+            """Follow the search cursor, handing each page to the counter"""
+            try:
+                after = None
+                while True:
+                    body = {**search_body, "after": after} if after else search_body
+                    result = await self._make_request("POST", endpoint, json_data=body)
+                    contacts = result.get('results', [])
+                    await pages.put(contacts)
+
+                    # Check for pagination
+                    after = result.get('paging', {}).get('next', {}).get('after')
+                    if not after or len(contacts) < 100:
+                        break
+                await pages.put(None)
+            except Exception as e:
+                await pages.put(e)
 
-            # Group by company
-            company_counts: Dict[str, int] = {}
-            for contact in all_contacts:
-                company_id = contact.get('properties', {}).get('associatedcompanyid')
-                if company_id:
-                    company_counts[company_id] = company_counts.get(company_id, 0) + 1
+        try:
+            producer = asyncio.create_task(fetch_pages())
+            company_counts: Counter = Counter()
+            try:
+                while (contacts := await pages.get()) is not None:
+                    if isinstance(contacts, Exception):
+                        raise contacts
+
+                    # Group by company
+                    company_counts.update(
+                        company_id
+                        for company_id in (
+                            contact.get('properties', {}).get('associatedcompanyid') for contact in contacts
+                        )
+                        if company_id
+                    )
+            finally:
+                producer.cancel()
 
             logger.info(f"Found contacts for {len(company_counts)} companies")
-            return company_counts
+            # Plain dict for the callers that probe it per account
+            return dict(company_counts)
         except Exception as e:
             logger.error(f"Error fetching contact counts: {e}")
             raise
 
+    @staticmethod
+    def _iter_form_submissions(
+            records: List[Dict[str, Any]],
+            since: Optional[datetime] = None,
+            predicate: Optional[Callable[[Optional[str], datetime], bool]] = None
+    ) -> Iterator[FormSubmission]:
+        """Parse raw submission records, skipping rows before building models"""
+        for record in records:
+            submitted_at = datetime.fromtimestamp(record['submittedAt'] / 1000)
+
+            if since and submitted_at < since:
+                continue
+
+            # Extract email from form values
+            email = None
+            for field in record.get('values', []):
+                if field.get('name') == 'email':
+                    email = field.get('value')
+                    break
+
+            if predicate and not predicate(email, submitted_at):
+                continue
+
+            yield _FORM_SUBMISSION_ADAPTER.validate_python({
+                'id': record.get('conversionId', ''),
+                'form_name': record.get('formId', 'Unknown'),
+                'submitted_at': submitted_at,
+                'contact_email': email,
+                'page_url': record.get('pageUrl')
+            })
+
     async def get_form_submissions(
             self,
             form_id: Optional[str] = None,
-            since: Optional[datetime] = None
+            since: Optional[datetime] = None,
+            predicate: Optional[Callable[[Optional[str], datetime], bool]] = None
     ) -> List[FormSubmission]:
-        """Fetch form submissions, optionally filtered by form and date"""
+        """
+        Fetch form submissions, optionally filtered by form and date
+        predicate(email, submitted_at) can reject rows during parsing
+        """
         endpoint = "/form-integrations/v1/submissions/forms"
 
         if form_id:
@@ -173,28 +218,7 @@ class HubSpotClient:
 
         try:
             result = await self._make_request("GET", endpoint)
-            submissions = []
-
-            for record in result.get('results', []):
-                submitted_at = datetime.fromtimestamp(record['submittedAt'] / 1000)
-
-                if since and submitted_at < since:
-                    continue
-
-                # Extract email from form values
-                email = None
-                for field in record.get('values', []):
-                    if field.get('name') == 'email':
-                        email = field.get('value')
-                        break
-
-                submissions.append(FormSubmission(
-                    id=record.get('conversionId', ''),
-                    form_name=record.get('formId', 'Unknown'),
-                    submitted_at=submitted_at,
-                    contact_email=email,
-                    page_url=record.get('pageUrl')
-                ))
+            submissions = list(self._iter_form_submissions(result.get('results', []), since, predicate))
 
             logger.info(f"Fetched {len(submissions)} form submissions")
             return submissions
@@ -205,17 +229,17 @@ class HubSpotClient:
     async def get_form_submissions_by_company(self, company_domain: str) -> List[FormSubmission]:
         """Get form submissions from contacts at a specific company domain"""
         # This requires matching email domains to company domains
-        all_submissions = await self.get_form_submissions()
+        domain = company_domain.lower()
+        subdomain_suffix = f".{domain}"
 
-        # Filter submissions by email domain
-        matched_submissions = []
-        for submission in all_submissions:
-            if submission.contact_email:
-                email_domain = submission.contact_email.split('@')[-1]
-                if company_domain.lower() in email_domain.lower():
-                    matched_submissions.append(submission)
+        def matches_domain(email: Optional[str], _: datetime) -> bool:
+            if not email:
+                return False
+            # Exact domain or a subdomain of it - "notacme.com" must not match "acme.com"
+            email_domain = email[email.rfind('@') + 1:].lower()
+            return email_domain == domain or email_domain.endswith(subdomain_suffix)
 
-        return matched_submissions
+        return await self.get_form_submissions(predicate=matches_domain)
 
     async def get_forms(self) -> List[Dict[str, Any]]:
         """Get list of all forms"""
@@ -249,21 +273,20 @@ class HubSpotClient:
         try:
             result = await self._make_request("POST", endpoint, json_data=search_body)
 
-            contacts = [
-                Contact(
-                    id=record['id'],
-                    email=record['properties'].get('email'),
-                    first_name=record['properties'].get('firstname'),
-                    last_name=record['properties'].get('lastname'),
-                    title=record['properties'].get('jobtitle'),
-                    source='hubspot',
-                    account_id=record['properties'].get('associatedcompanyid'),
-                    created_at=datetime.fromisoformat(
-                        record['properties']['createdate'].replace('Z', '+00:00')
-                    ) if record['properties'].get('createdate') else None
-                )
+            contacts = _CONTACTS_ADAPTER.validate_python([
+                {
+                    'id': record['id'],
+                    'email': props.get('email'),
+                    'first_name': props.get('firstname'),
+                    'last_name': props.get('lastname'),
+                    'title': props.get('jobtitle'),
+                    'source': 'hubspot',
+                    'account_id': props.get('associatedcompanyid'),
+                    'created_at': _parse_dt(props['createdate']) if props.get('createdate') else None
+                }
                 for record in result.get('results', [])
-            ]
+                for props in (record['properties'],)
+            ])
 
             logger.info(f"Found {len(contacts)} contacts for domain {domain}")
             return contacts
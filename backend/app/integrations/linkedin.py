@@ -2,72 +2,66 @@
 ABM Reporter - LinkedIn Integration
 Handles LinkedIn Ads API and Organic Page analytics
 """
+import asyncio
 import logging
+import threading
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timedelta
-import httpx
 
-from ..config import get_settings
 from ..models.account import LinkedInMetrics
+from ._http import BaseAPIClient
 
 logger = logging.getLogger(__name__)
 
+# Only header that differs for the versioned REST API; the rest are client defaults
+_REST_API_HEADERS = {"LinkedIn-Version": "202401"}
+_CAMPAIGN_URN_PREFIX = "urn:li:sponsoredCampaign:"
 
-class LinkedInClient:
+
+class LinkedInClient(BaseAPIClient):
     """LinkedIn Marketing API client for ABM data"""
 
     BASE_URL = "https://api.linkedin.com/v2"
     ADS_BASE_URL = "https://api.linkedin.com/rest"
+    SERVICE_NAME = "LinkedIn"
+    FOLLOWER_STATS_TTL = 300  # seconds; follower counts move slowly
+    ANALYTICS_TTL = 60  # seconds
+    CAMPAIGN_META_TTL = 3600  # seconds; campaign schedules rarely change
+    CAMPAIGNS_PER_REQUEST = 100
+    CAMPAIGNS_PAGE_SIZE = 1000  # adCampaigns search maximum
 
     def __init__(self):
-        self.settings = get_settings()
+        super().__init__()
         self._access_token = self.settings.LINKEDIN_ACCESS_TOKEN
         self._organization_id = self.settings.LINKEDIN_ORGANIZATION_ID
         self._ad_account_id = self.settings.LINKEDIN_AD_ACCOUNT_ID
-
-    def _get_headers(self, use_rest_api: bool = False) -> Dict[str, str]:
-        """Get authentication headers"""
-        headers = {
+        self._headers = {
             "Authorization": f"Bearer {self._access_token}",
             "Content-Type": "application/json",
             "X-Restli-Protocol-Version": "2.0.0"
         }
 
-        if use_rest_api:
-            headers["LinkedIn-Version"] = "202401"
-
-        return headers
-
     async def _make_request(
             self,
             method: str,
             endpoint: str,
             params: Optional[Dict] = None,
             json_data: Optional[Dict] = None,
-            use_rest_api: bool = False
+            use_rest_api: bool = False,
+            cache_ttl: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Make authenticated request to LinkedIn API"""
-        base = self.ADS_BASE_URL if use_rest_api else self.BASE_URL
-        url = f"{base}{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=self._get_headers(use_rest_api),
-                    params=params,
-                    json=json_data,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"LinkedIn API error: {e.response.status_code} - {e.response.text}")
-                raise
-            except Exception as e:
-                logger.error(f"LinkedIn request error: {e}")
-                raise
+        """Make authenticated request to LinkedIn API over the pooled client"""
+        if use_rest_api:
+            # Absolute URL bypasses the v2 base_url on the shared client
+            return await super()._make_request(
+                method,
+                f"{self.ADS_BASE_URL}{endpoint}",
+                params,
+                json_data,
+                headers=_REST_API_HEADERS,
+                cache_ttl=cache_ttl
+            )
+        return await super()._make_request(method, endpoint, params, json_data, cache_ttl=cache_ttl)
 
     async def get_organization_page_statistics(
             self,
@@ -100,15 +94,15 @@ class LinkedInClient:
         }
 
         try:
-            result = await self._make_request("GET", endpoint, params=params)
+            result = await self._make_request("GET", endpoint, params=params, cache_ttl=self.ANALYTICS_TTL)
             logger.info("Fetched LinkedIn organic page statistics")
             return result
         except Exception as e:
             logger.error(f"Error fetching page statistics: {e}")
             raise
 
-    async def get_page_follower_statistics(self) -> Dict[str, Any]:
-        """Get follower statistics by various dimensions"""
+    async def _fetch_follower_stats(self) -> Dict[str, Any]:
+        """Fetch raw follower statistics, shared by the follower views below"""
         if not self._organization_id:
             raise ValueError("LinkedIn Organization ID not configured")
 
@@ -117,10 +111,12 @@ class LinkedInClient:
             "q": "organizationalEntity",
             "organizationalEntity": f"urn:li:organization:{self._organization_id}"
         }
+        return await self._make_request("GET", endpoint, params=params, cache_ttl=self.FOLLOWER_STATS_TTL)
 
+    async def get_page_follower_statistics(self) -> Dict[str, Any]:
+        """Get follower statistics by various dimensions"""
         try:
-            result = await self._make_request("GET", endpoint, params=params)
-            return result
+            return await self._fetch_follower_stats()
         except Exception as e:
             logger.error(f"Error fetching follower statistics: {e}")
             raise
@@ -137,22 +133,56 @@ class LinkedInClient:
         }
 
         try:
-            result = await self._make_request("GET", endpoint, params=params, use_rest_api=True)
-            campaigns = result.get('elements', [])
+            # Follow the page cursor so the metadata covers every campaign in the account
+            campaigns = []
+            page_token = None
+            while True:
+                page_params = {**params, "pageSize": self.CAMPAIGNS_PAGE_SIZE}
+                if page_token:
+                    page_params["pageToken"] = page_token
+                result = await self._make_request(
+                    "GET", endpoint, params=page_params, use_rest_api=True, cache_ttl=self.CAMPAIGN_META_TTL
+                )
+                campaigns.extend(result.get('elements', []))
+
+                page_token = result.get('metadata', {}).get('nextPageToken')
+                if not page_token:
+                    break
             logger.info(f"Fetched {len(campaigns)} LinkedIn ad campaigns")
             return campaigns
         except Exception as e:
             logger.error(f"Error fetching ad campaigns: {e}")
             raise
 
+    async def get_campaigns_meta(self) -> Dict[str, Dict[str, Any]]:
+        """Get campaign metadata (status, run schedule) keyed by campaign ID"""
+        campaigns = await self.get_ad_campaigns()
+        return {str(campaign['id']): campaign for campaign in campaigns if 'id' in campaign}
+
+    @staticmethod
+    def _active_campaigns(
+            campaign_ids: List[str],
+            campaigns_meta: Dict[str, Dict[str, Any]],
+            start_date: datetime
+    ) -> List[str]:
+        """Drop campaigns whose run schedule ended before start_date"""
+        active = []
+        for cid in campaign_ids:
+            run_end = campaigns_meta.get(cid, {}).get('runSchedule', {}).get('end')
+            if run_end is None or datetime.utcfromtimestamp(run_end / 1000) >= start_date:
+                active.append(cid)
+        return active
+
     async def get_ad_analytics(
             self,
             start_date: Optional[datetime] = None,
             end_date: Optional[datetime] = None,
-            campaign_ids: Optional[List[str]] = None
+            campaign_ids: Optional[List[str]] = None,
+            campaigns_meta: Optional[Dict[str, Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get ad analytics (impressions, clicks, spend, etc.)
+        With campaigns_meta (see get_campaigns_meta), campaigns that ended before start_date are skipped
         """
         if not self._ad_account_id:
             raise ValueError("LinkedIn Ad Account ID not configured")
@@ -162,6 +192,19 @@ class LinkedInClient:
         if not end_date:
             end_date = datetime.utcnow()
 
+        # Campaigns to query; None means the whole account
+        campaigns = campaign_ids or None
+        if campaigns_meta is not None:
+            candidates = campaign_ids or list(campaigns_meta)
+            active = self._active_campaigns(candidates, campaigns_meta, start_date)
+            if not active:
+                logger.info("No LinkedIn campaigns ran in the requested date range")
+                return []
+            # Finished campaigns have no rows in range anyway, so for the whole account only
+            # name the active ones when that still fits in a single request
+            if campaign_ids or (len(active) < len(candidates) and len(active) <= self.CAMPAIGNS_PER_REQUEST):
+                campaigns = active
+
         endpoint = "/adAnalytics"
         params = {
             "q": "analytics",
@@ -177,18 +220,40 @@ class LinkedInClient:
             "fields": "impressions,clicks,costInLocalCurrency,dateRange"
         }
 
-        if campaign_ids:
-            params["campaigns"] = ",".join([f"urn:li:sponsoredCampaign:{cid}" for cid in campaign_ids])
+        # One request per slice of campaigns keeps URLs under LinkedIn's gateway limit
+        param_sets = [params]
+        if campaigns:
+            step = self.CAMPAIGNS_PER_REQUEST
+            param_sets = [
+                {**params, "campaigns": ",".join(_CAMPAIGN_URN_PREFIX + cid for cid in campaigns[i:i + step])}
+                for i in range(0, len(campaigns), step)
+            ]
 
         try:
-            result = await self._make_request("GET", endpoint, params=params, use_rest_api=True)
-            analytics = result.get('elements', [])
+            results = await asyncio.gather(*(
+                self._make_request("GET", endpoint, params=p, use_rest_api=True, cache_ttl=self.ANALYTICS_TTL)
+                for p in param_sets
+            ))
+            analytics = [element for result in results for element in result.get('elements', [])]
             logger.info(f"Fetched analytics for {len(analytics)} campaigns")
             return analytics
         except Exception as e:
             logger.error(f"Error fetching ad analytics: {e}")
             raise
 
+    async def get_active_ad_analytics(
+            self,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Get ad analytics, skipping finished campaigns when their run schedules are available"""
+        try:
+            campaigns_meta = await self.get_campaigns_meta()
+        except Exception as e:
+            logger.warning(f"Could not fetch campaign metadata, querying all campaigns: {e}")
+            campaigns_meta = None
+        return await self.get_ad_analytics(start_date, end_date, campaigns_meta=campaigns_meta)
+
     async def get_company_engagement(
             self,
             company_name: str,
@@ -199,10 +264,19 @@ class LinkedInClient:
         Get aggregated LinkedIn metrics for a specific company
         Note: This requires LinkedIn Page Insights access for member company data
         """
-        # Get organic stats
-        try:
-            organic_stats = await self.get_organization_page_statistics(start_date, end_date)
+        # Organic and ad stats are independent, fetch them concurrently
+        organic_stats, ad_stats = await asyncio.gather(
+            self.get_organization_page_statistics(start_date, end_date),
+            self.get_active_ad_analytics(start_date, end_date),
+            return_exceptions=True
+        )
 
+        if isinstance(organic_stats, Exception):
+            logger.warning(f"Could not fetch organic stats: {organic_stats}")
+            total_impressions = 0
+            total_clicks = 0
+            engagement_rate = 0
+        else:
             total_impressions = 0
             total_clicks = 0
             total_engagement = 0
@@ -215,27 +289,23 @@ class LinkedInClient:
 
             engagement_rate = (total_engagement / total_impressions * 100) if total_impressions > 0 else 0
 
-        except Exception as e:
-            logger.warning(f"Could not fetch organic stats: {e}")
-            total_impressions = 0
-            total_clicks = 0
-            engagement_rate = 0
-
-        # Get ad stats
-        try:
-            ad_stats = await self.get_ad_analytics(start_date, end_date)
-
-            ad_impressions = sum(el.get('impressions', 0) for el in ad_stats)
-            ad_clicks = sum(el.get('clicks', 0) for el in ad_stats)
-            ad_spend = sum(el.get('costInLocalCurrency', 0) for el in ad_stats)
-            ad_ctr = (ad_clicks / ad_impressions * 100) if ad_impressions > 0 else 0
-
-        except Exception as e:
-            logger.warning(f"Could not fetch ad stats: {e}")
+        if isinstance(ad_stats, Exception):
+            logger.warning(f"Could not fetch ad stats: {ad_stats}")
             ad_impressions = 0
             ad_clicks = 0
             ad_spend = 0
             ad_ctr = 0
+        else:
+            ad_impressions = 0
+            ad_clicks = 0
+            ad_spend = 0
+
+            for element in ad_stats:
+                ad_impressions += element.get('impressions', 0)
+                ad_clicks += element.get('clicks', 0)
+                ad_spend += element.get('costInLocalCurrency', 0)
+
+            ad_ctr = (ad_clicks / ad_impressions * 100) if ad_impressions > 0 else 0
 
         return LinkedInMetrics(
             organic_impressions=total_impressions,
@@ -252,30 +322,16 @@ class LinkedInClient:
         Get follower breakdown by company
         This shows which companies your page followers work at
         """
-        if not self._organization_id:
-            raise ValueError("LinkedIn Organization ID not configured")
-
-        endpoint = "/organizationalEntityFollowerStatistics"
-        params = {
-            "q": "organizationalEntity",
-            "organizationalEntity": f"urn:li:organization:{self._organization_id}"
-        }
-
         try:
-            result = await self._make_request("GET", endpoint, params=params)
+            result = await self._fetch_follower_stats()
 
             # Parse follower counts by company
-            company_followers = {}
-            for element in result.get('elements', []):
-                follower_counts = element.get('followerCountsByAssociationType', [])
-                for fc in follower_counts:
-                    if fc.get('associationType') == 'COMPANY':
-                        company_urn = fc.get('organizationalEntity', '')
-                        count = fc.get('followerCounts', {}).get('organicFollowerCount', 0)
-                        if company_urn:
-                            company_followers[company_urn] = count
-
-            return company_followers
+            return {
+                fc['organizationalEntity']: fc.get('followerCounts', {}).get('organicFollowerCount', 0)
+                for element in result.get('elements', [])
+                for fc in element.get('followerCountsByAssociationType', [])
+                if fc.get('associationType') == 'COMPANY' and fc.get('organizationalEntity')
+            }
         except Exception as e:
             logger.error(f"Error fetching follower breakdown: {e}")
             raise
@@ -283,11 +339,15 @@ class LinkedInClient:
 
 # Singleton instance
 _linkedin_client: Optional[LinkedInClient] = None
+_linkedin_client_lock = threading.Lock()
 
 
 def get_linkedin_client() -> LinkedInClient:
     """Get or create LinkedIn client singleton"""
     global _linkedin_client
     if _linkedin_client is None:
-        _linkedin_client = LinkedInClient()
+        # Sync dependencies run in FastAPI's threadpool, so guard construction
+        with _linkedin_client_lock:
+            if _linkedin_client is None:
+                _linkedin_client = LinkedInClient()
     return _linkedin_client
@@ -2,63 +2,390 @@
 ABM Reporter - Salesforce Integration
 Handles all Salesforce data fetching for accounts, contacts, and opportunities
 """
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+import re
+import threading
+from typing import List, Dict, Optional, Any, AsyncIterator, Iterator, Sequence
 from datetime import datetime, timedelta
+import orjson
 from simple_salesforce import Salesforce
-from simple_salesforce.exceptions import SalesforceError
+from simple_salesforce.exceptions import SalesforceError, SalesforceExpiredSession
+
+try:
+    from ciso8601 import parse_datetime as _parse_dt
+except ImportError:
+    _parse_dt = datetime.fromisoformat  # accepts a trailing 'Z' on Python 3.11+
+
+from ..cache import cached, get_cache, invalidate
 from ..config import get_settings
 from ..models.account import Contact, Opportunity
 
 logger = logging.getLogger(__name__)
 
 
+def _esc(value: str) -> str:
+    """Escape a value for use inside a quoted SOQL string literal"""
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def _esc_like(value: str) -> str:
+    """Escape a value for use inside a LIKE pattern, matching % and _ literally"""
+    return _esc(value).replace('%', '\\%').replace('_', '\\_')
+
+
+_URL_PREFIX = re.compile(r'^(?:[a-z][a-z0-9+.-]*://)?(?:www\.)?')
+
+
+def _normalize_domain(value: str) -> str:
+    """Reduce a domain or URL to its bare lowercase host, e.g. 'https://www.Acme.com/x' -> 'acme.com'"""
+    return _URL_PREFIX.sub('', value.strip().lower()).split('/', 1)[0]
+
+
+def _normalize_domains(values: Sequence[str]) -> List[str]:
+    """Normalize, dedupe and sort domains, dropping empties"""
+    return sorted({d for d in map(_normalize_domain, values) if d})
+
+
+def _in_list(values: Sequence[str]) -> str:
+    """Render values as an escaped SOQL IN (...) list body"""
+    return ",".join(f"'{_esc(value)}'" for value in values)
+
+
+_SOSL_RESERVED = re.compile(r'([?&|!{}\[\]()^~*:\\"\'+\-])')
+
+
+def _esc_sosl(value: str) -> str:
+    """Escape SOSL reserved characters in a search term"""
+    return _SOSL_RESERVED.sub(r'\\\1', value)
+
+
+def _chunk(ids: Sequence[str], n: int) -> Iterator[Sequence[str]]:
+    """Split ids into slices of at most n items"""
+    for i in range(0, len(ids), n):
+        yield ids[i:i + n]
+
+
+class _ORJSONSalesforce(Salesforce):
+    """Salesforce client that decodes responses with orjson into plain dicts"""
+
+    def parse_result_to_json(self, result):
+        # orjson has no parse_float hook, so a configured one keeps the stock stdlib parser
+        if self._parse_float is not None:
+            return super().parse_result_to_json(result)
+        # Otherwise floats decode as float either way; only the OrderedDict hook is dropped
+        return orjson.loads(result.content)
+
+
+# Query templates; placeholders are filled with _esc/_esc_like-escaped values
+# Columns the account report reads; the detail set adds address, type and audit dates
+_ACCOUNT_REPORT_FIELDS = ("Id", "Name", "Website", "Industry", "NumberOfEmployees", "AnnualRevenue")
+_ACCOUNT_DETAIL_FIELDS = _ACCOUNT_REPORT_FIELDS + (
+    "BillingCity", "BillingCountry", "Type", "CreatedDate", "LastModifiedDate"
+)
+_ACCOUNTS_SOQL = """
+    SELECT {fields}
+    FROM Account
+    WHERE IsDeleted = false
+"""
+# Search-index lookup; SOSL has no per-field search group for Website, so
+# matches are re-checked against Website client-side
+_ACCOUNTS_BY_DOMAINS_SOSL = """
+    FIND {{{terms}}} IN ALL FIELDS
+    RETURNING Account({fields}{order} LIMIT {limit})
+"""
+_CONTACT_FIELDS = "Id, Email, FirstName, LastName, Title, AccountId, CreatedDate"
+_CONTACTS_BY_ACCOUNT_SOQL = f"""
+    SELECT {_CONTACT_FIELDS}
+    FROM Contact
+    WHERE AccountId = '{{}}'
+    AND IsDeleted = false
+"""
+_CONTACTS_BY_ACCOUNTS_SOQL = f"""
+    SELECT {_CONTACT_FIELDS}
+    FROM Contact
+    WHERE AccountId IN ({{}})
+    AND IsDeleted = false
+"""
+_OPPORTUNITY_FIELDS = """Id, Name, Amount, StageName, CloseDate,
+           IsWon, IsClosed, AccountId, CreatedDate"""
+_OPPORTUNITIES_BY_ACCOUNT_SOQL = f"""
+    SELECT {_OPPORTUNITY_FIELDS}
+    FROM Opportunity
+    WHERE AccountId = '{{}}'
+    AND IsDeleted = false
+"""
+_OPPORTUNITIES_BY_ACCOUNTS_SOQL = f"""
+    SELECT {_OPPORTUNITY_FIELDS}
+    FROM Opportunity
+    WHERE AccountId IN ({{}})
+    AND IsDeleted = false
+"""
+_ACCOUNTS_BY_DOMAIN_SOQL = """
+    SELECT Id, Name, Website, Industry, NumberOfEmployees, AnnualRevenue
+    FROM Account
+    WHERE Website LIKE '%{}%'
+    AND IsDeleted = false
+"""
+# Aggregate queries cap at 2000 groups and can't use queryMore, so they page
+# by AccountId: {after} narrows to accounts at or past the previous page's last
+_OPPORTUNITY_SUMMARY_SOQL = """
+    SELECT AccountId, StageName, COUNT(Id) cnt, SUM(Amount) amt
+    FROM Opportunity
+    WHERE AccountId != null AND IsDeleted = false{after}
+    GROUP BY AccountId, StageName
+    ORDER BY AccountId
+    LIMIT {limit}
+"""
+_CONTACT_COUNTS_SOQL = """
+    SELECT AccountId, COUNT(Id) contactCount
+    FROM Contact
+    WHERE AccountId != null AND IsDeleted = false{after}
+    GROUP BY AccountId
+    ORDER BY AccountId
+    LIMIT {limit}
+"""
+# Closed stages by summary bucket; every other stage counts as open pipeline
+_CLOSED_STAGE_BUCKETS = {'Closed Won': 'closed_won', 'Closed Lost': 'closed_lost'}
+_WEBSITE_LIKE_SOQL = "Website LIKE '%{}%'"
+_WEBSITE_IN_SOQL = " AND Website IN ({})"
+# Common spellings of a bare domain in the Website field, for index-friendly exact matching
+_WEBSITE_PREFIXES = ("", "www.", "http://", "https://", "http://www.", "https://www.")
+
+
+def _website_variants(domain: str) -> Iterator[str]:
+    """Yield the Website values an exact match on domain should accept"""
+    for prefix in _WEBSITE_PREFIXES:
+        yield f"{prefix}{domain}"
+        yield f"{prefix}{domain}/"
+
+
+_RECENTLY_MODIFIED_ACCOUNTS_SOQL = """
+    SELECT Id, Name, Website, Industry, LastModifiedDate
+    FROM Account
+    WHERE LastModifiedDate >= {}
+    AND IsDeleted = false
+    ORDER BY LastModifiedDate DESC
+"""
+
+
 class SalesforceClient:
     """Salesforce API client for ABM data"""
+
+    IN_CLAUSE_CHUNK_SIZE = 500  # keeps each query well under the SOQL length limit
+    SOSL_MIN_DOMAINS = 5  # below this a few LIKE filters are cheaper than a search round-trip
+    SOSL_TERMS_PER_QUERY = 99
+    AGGREGATE_ROW_LIMIT = 2000  # Salesforce's max rows per aggregate query
+    SOSL_ROW_LIMIT = 2000  # Salesforce's max rows per SOSL object
+    QUERY_CONCURRENCY = 8  # queries in flight at once on worker threads
+    # Aggregates move on the order of minutes: serve them fresh for a minute, stale for five more
+    AGGREGATE_CACHE_TTL = 60
+    AGGREGATE_CACHE_STALE = 300
+    CONTACT_COUNTS_CACHE_KEY = "sfdc:contact_counts"
+    # Session shared across workers so each doesn't spend a SOAP login on cold start
+    SESSION_CACHE_KEY = "sfdc:session"
+    SESSION_LOCK_KEY = "sfdc:session:lock"
+    SESSION_TTL = 3600
+    SESSION_LOCK_TTL = 30
+    HEARTBEAT_INTERVAL = 20 * 60  # seconds; well inside Salesforce's shortest idle timeout
+    OPPORTUNITY_SUMMARY_CACHE_KEY = "sfdc:opp_summary"
     
     def __init__(self):
         self.settings = get_settings()
         self._client: Optional[Salesforce] = None
+        self._query_slots = asyncio.Semaphore(self.QUERY_CONCURRENCY)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
     
-    def _get_client(self) -> Salesforce:
-        """Get or create Salesforce client"""
+    def _new_client(self) -> Salesforce:
+        """Log in to Salesforce with the configured credentials"""
+        try:
+            client = _ORJSONSalesforce(
+                username=self.settings.SFDC_USERNAME,
+                password=self.settings.SFDC_PASSWORD,
+                security_token=self.settings.SFDC_SECURITY_TOKEN,
+                domain=self.settings.SFDC_DOMAIN
+            )
+            logger.info("Successfully connected to Salesforce")
+            return client
+        except SalesforceError as e:
+            logger.error(f"Failed to connect to Salesforce: {e}")
+            raise
+
+    async def _ensure_client(self) -> Salesforce:
+        """Get the client for coroutines, connecting off the event loop if there isn't one yet"""
         if self._client is None:
-            try:
-                self._client = Salesforce(
-                    username=self.settings.SFDC_USERNAME,
-                    password=self.settings.SFDC_PASSWORD,
-                    security_token=self.settings.SFDC_SECURITY_TOKEN,
-                    domain=self.settings.SFDC_DOMAIN
-                )
-                logger.info("Successfully connected to Salesforce")
-            except SalesforceError as e:
-                logger.error(f"Failed to connect to Salesforce: {e}")
-                raise
+            # Concurrent first queries share one connect
+            async with self._connect_lock:
+                if self._client is None:
+                    await self.connect()
         return self._client
+
+    async def invalidate_cache(self):
+        """Drop the cached aggregates so the next call queries Salesforce"""
+        await invalidate(self.CONTACT_COUNTS_CACHE_KEY, self.OPPORTUNITY_SUMMARY_CACHE_KEY)
+
+    async def _load_session(self) -> Optional[Salesforce]:
+        """Rebuild a client from the session shared in Redis, if it is still valid"""
+        try:
+            session = await get_cache().get(self.SESSION_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read shared Salesforce session: {e}")
+            return None
+        if not session:
+            return None
+
+        client = _ORJSONSalesforce(session_id=session['session_id'], instance_url=session['instance_url'])
+        try:
+            await asyncio.to_thread(client.limits)
+        except SalesforceError as e:
+            logger.info(f"Shared Salesforce session rejected, logging in again: {e}")
+            return None
+        return client
+
+    async def _login(self):
+        """Log in and publish the session to Redis, letting only one worker log in at a time"""
+        cache = get_cache()
+        try:
+            locked = await cache.add(self.SESSION_LOCK_KEY, 1, ttl=self.SESSION_LOCK_TTL)
+        except ValueError:
+            locked = False
+        except Exception as e:
+            logger.warning(f"Could not take Salesforce login lock: {e}")
+            locked = True
+
+        if not locked:
+            # Another worker is logging in; give it a moment and pick up its session
+            await asyncio.sleep(2)
+            client = await self._load_session()
+            if client is not None:
+                self._client = client
+                return
+
+        # Swap in the new client only once it has logged in; queries keep using the old one meanwhile
+        sf = await asyncio.to_thread(self._new_client)
+        self._client = sf
+        try:
+            await cache.set(
+                self.SESSION_CACHE_KEY,
+                {'session_id': sf.session_id, 'instance_url': f"https://{sf.sf_instance}"},
+                ttl=self.SESSION_TTL
+            )
+            if locked:
+                await cache.delete(self.SESSION_LOCK_KEY)
+        except Exception as e:
+            logger.warning(f"Could not share Salesforce session: {e}")
+
+    async def _heartbeat(self):
+        """Keep the session alive with a cheap limits call, logging in again if it expired"""
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL)
+            try:
+                await self._run((await self._ensure_client()).limits)
+            except SalesforceExpiredSession:
+                logger.warning("Salesforce session expired, logging in again")
+                try:
+                    await self._login()
+                except Exception as e:
+                    logger.error(f"Salesforce re-login failed: {e}")
+            except Exception as e:
+                logger.warning(f"Salesforce heartbeat failed: {e}")
+
+    async def connect(self):
+        """Restore the shared session or log in ahead of the first query, then keep it alive"""
+        if self._client is None:
+            self._client = await self._load_session()
+        if self._client is None:
+            await self._login()
+        else:
+            logger.info("Reusing shared Salesforce session")
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def aclose(self):
+        """Stop the session heartbeat"""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _run(self, func, *args) -> Any:
+        """Run a blocking simple_salesforce call on a worker thread, bounded by QUERY_CONCURRENCY"""
+        async with self._query_slots:
+            return await asyncio.to_thread(func, *args)
     
-    async def get_accounts(self, domains: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _to_contact(record: Dict[str, Any]) -> Contact:
+        """Build a Contact from a Salesforce Contact record"""
+        created_date = record.get('CreatedDate')
+        # Salesforce already returns typed JSON; skip pydantic validation per record
+        return Contact.model_construct(
+            id=record['Id'],
+            email=record.get('Email'),
+            first_name=record.get('FirstName'),
+            last_name=record.get('LastName'),
+            title=record.get('Title'),
+            source='sfdc',
+            account_id=record.get('AccountId'),
+            created_at=_parse_dt(created_date) if created_date else None
+        )
+
+    @staticmethod
+    def _to_opportunity(record: Dict[str, Any]) -> Opportunity:
+        """Build an Opportunity from a Salesforce Opportunity record"""
+        amount = record.get('Amount')
+        close_date = record.get('CloseDate')
+        created_date = record.get('CreatedDate')
+        return Opportunity.model_construct(
+            id=record['Id'],
+            name=record['Name'],
+            amount=float(amount) if amount is not None else None,
+            stage=record['StageName'],
+            close_date=_parse_dt(close_date) if close_date else None,
+            is_won=record.get('IsWon', False),
+            is_closed=record.get('IsClosed', False),
+            account_id=record['AccountId'],
+            created_at=_parse_dt(created_date) if created_date else None
+        )
+
+    async def get_accounts(
+            self,
+            domains: Optional[List[str]] = None,
+            *,
+            full: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            order_by_name: bool = False,
+            exact: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Fetch accounts from Salesforce
-        Optionally filter by website domains
+        Optionally filter by website domains; exact=True matches whole Website values via the index
+        Only the report columns are selected unless full=True or fields is given
         """
-        sf = self._get_client()
+        fields = ", ".join(fields or (_ACCOUNT_DETAIL_FIELDS if full else _ACCOUNT_REPORT_FIELDS))
+
+        if domains:
+            domains = _normalize_domains(domains)
+
+        if domains and exact:
+            return await self._get_accounts_by_websites(domains, fields, order_by_name)
+
+        if domains and len(domains) >= self.SOSL_MIN_DOMAINS:
+            return await self._search_accounts_by_domains(domains, fields, order_by_name)
+
+        sf = await self._ensure_client()
         
-        query = """
-            SELECT Id, Name, Website, Industry, NumberOfEmployees,
-                   AnnualRevenue, BillingCity, BillingCountry, Type,
-                   CreatedDate, LastModifiedDate
-            FROM Account
-            WHERE IsDeleted = false
-        """
+        query = _ACCOUNTS_SOQL.format(fields=fields)
         
         if domains:
-            domain_conditions = " OR ".join([f"Website LIKE '%{d}%'" for d in domains])
+            # Normalised domains keep the query text identical for the same domain set
+            domain_conditions = " OR ".join(_WEBSITE_LIKE_SOQL.format(_esc_like(d)) for d in domains)
             query += f" AND ({domain_conditions})"
         
-        query += " ORDER BY Name"
+        if order_by_name:
+            query += " ORDER BY Name"
         
         try:
-            result = sf.query_all(query)
+            result = await self._run(sf.query_all, query)
             accounts = result.get('records', [])
             logger.info(f"Fetched {len(accounts)} accounts from Salesforce")
             return accounts
@@ -66,164 +393,254 @@ class SalesforceClient:
             logger.error(f"Error fetching accounts: {e}")
             raise
     
-    async def get_contacts_by_account(self, account_id: str) -> List[Contact]:
-        """Fetch all contacts for a specific account"""
-        sf = self._get_client()
-        
-        query = f"""
-            SELECT Id, Email, FirstName, LastName, Title, AccountId, CreatedDate
-            FROM Contact
-            WHERE AccountId = '{account_id}'
-            AND IsDeleted = false
-        """
-        
+    async def _get_accounts_by_websites(
+            self,
+            domains: List[str],
+            fields: str,
+            order_by_name: bool
+    ) -> List[Dict[str, Any]]:
+        """Find accounts whose Website is exactly one of the domains, allowing scheme/www/trailing slash"""
+        sf = await self._ensure_client()
+        websites = sorted({w for d in domains for w in _website_variants(d)})
+        base_query = _ACCOUNTS_SOQL.format(fields=fields)
+
         try:
-            result = sf.query_all(query)
-            contacts = [
-                Contact(
-                    id=record['Id'],
-                    email=record.get('Email'),
-                    first_name=record.get('FirstName'),
-                    last_name=record.get('LastName'),
-                    title=record.get('Title'),
-                    source='sfdc',
-                    account_id=record.get('AccountId'),
-                    created_at=datetime.fromisoformat(record['CreatedDate'].replace('Z', '+00:00'))
-                    if record.get('CreatedDate') else None
+            results = await asyncio.gather(*(
+                self._run(sf.query_all, base_query + _WEBSITE_IN_SOQL.format(_in_list(chunk)))
+                for chunk in _chunk(websites, self.IN_CLAUSE_CHUNK_SIZE)
+            ))
+        except SalesforceError as e:
+            logger.error(f"Error fetching accounts for {len(domains)} websites: {e}")
+            raise
+
+        accounts = list({
+            record['Id']: record for result in results for record in result.get('records', [])
+        }.values())
+        if order_by_name:
+            accounts.sort(key=lambda a: a.get('Name') or '')
+        logger.info(f"Fetched {len(accounts)} accounts from Salesforce by exact website")
+        return accounts
+
+    async def _search_accounts_by_domains(
+            self,
+            domains: List[str],
+            fields: str,
+            order_by_name: bool
+    ) -> List[Dict[str, Any]]:
+        """Find accounts for many domains through the search index instead of a LIKE scan"""
+        sf = await self._ensure_client()
+        accounts: Dict[str, Dict[str, Any]] = {}
+        # One compiled alternation re-checks every hit instead of a per-domain substring loop
+        matches_domain = re.compile("|".join(map(re.escape, domains)), re.IGNORECASE).search
+
+        chunks = list(_chunk(domains, self.SOSL_TERMS_PER_QUERY))
+        order = " ORDER BY Name" if order_by_name else ""
+
+        try:
+            results = await asyncio.gather(*(
+                self._run(sf.search, _ACCOUNTS_BY_DOMAINS_SOSL.format(
+                    terms=" OR ".join(f'"{_esc_sosl(d)}"' for d in chunk),
+                    fields=fields, order=order, limit=self.SOSL_ROW_LIMIT
+                ))
+                for chunk in chunks
+            ))
+
+            # A full result may be truncated, so re-run those chunks as a LIKE scan
+            records = []
+            truncated = []
+            for chunk, result in zip(chunks, results):
+                chunk_records = (result or {}).get('searchRecords', [])
+                if len(chunk_records) >= self.SOSL_ROW_LIMIT:
+                    truncated.append(chunk)
+                else:
+                    records.extend(chunk_records)
+            if truncated:
+                logger.warning(
+                    f"Salesforce search hit the {self.SOSL_ROW_LIMIT}-row limit for "
+                    f"{len(truncated)} domain chunk(s), falling back to a LIKE query"
                 )
-                for record in result.get('records', [])
-            ]
-            return contacts
+                base_query = _ACCOUNTS_SOQL.format(fields=fields)
+                like_results = await asyncio.gather(*(
+                    self._run(sf.query_all, base_query + " AND ({})".format(
+                        " OR ".join(_WEBSITE_LIKE_SOQL.format(_esc_like(d)) for d in chunk)
+                    ))
+                    for chunk in truncated
+                ))
+                records.extend(record for result in like_results for record in result.get('records', []))
+
+            for record in records:
+                if matches_domain(record.get('Website') or ''):
+                    accounts[record['Id']] = record
+        except SalesforceError as e:
+            logger.error(f"Error searching accounts for {len(domains)} domains: {e}")
+            raise
+
+        result_accounts = list(accounts.values())
+        if order_by_name:
+            result_accounts.sort(key=lambda a: a.get('Name') or '')
+        logger.info(f"Fetched {len(result_accounts)} accounts from Salesforce search")
+        return result_accounts
+
+    async def _iter_records(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield query records page by page, fetching the next page only once the current one is consumed"""
+        sf = await self._ensure_client()
+        result = await self._run(sf.query, query)
+        while True:
+            # Detach the page so it can be reclaimed once iterated
+            records = result.pop('records', [])
+            for record in records:
+                yield record
+            if result.get('done', True):
+                break
+            result = await self._run(sf.query_more, result['nextRecordsUrl'], True)
+
+    async def iter_contacts_by_account(self, account_id: str) -> AsyncIterator[Contact]:
+        """Stream contacts for a specific account"""
+        query = _CONTACTS_BY_ACCOUNT_SOQL.format(_esc(account_id))
+        
+        try:
+            async for record in self._iter_records(query):
+                yield self._to_contact(record)
         except SalesforceError as e:
             logger.error(f"Error fetching contacts for account {account_id}: {e}")
             raise
 
+    async def get_contacts_by_account(self, account_id: str) -> List[Contact]:
+        """Fetch all contacts for a specific account; prefer get_contacts_for_accounts for several"""
+        contacts = await self.get_contacts_for_accounts([account_id])
+        return contacts.get(account_id, [])
+
+    @cached(CONTACT_COUNTS_CACHE_KEY, ttl=AGGREGATE_CACHE_TTL, stale=AGGREGATE_CACHE_STALE)
     async def get_contacts_count_by_account(self) -> Dict[str, int]:
         """Get contact counts grouped by account"""
-        sf = self._get_client()
-        # Use query() not query_all() - aggregate queries don't support pagination
-        # LIMIT 2000 is Salesforce's max for aggregate queries
-        query = """
-            SELECT AccountId, COUNT(Id) contactCount
-            FROM Contact
-            WHERE AccountId != null AND IsDeleted = false
-            GROUP BY AccountId
-            LIMIT 2000
-        """
         try:
-            result = sf.query(query)
-            return {
-                record['AccountId']: record['contactCount']
-                for record in result.get('records', [])
-            }
+            # Paged by AccountId so tenants with more than 2000 accounts aren't truncated
+            groups = await self._query_grouped_by_account(_CONTACT_COUNTS_SOQL)
+            return {group['AccountId']: group['contactCount'] for group in groups}
         except SalesforceError as e:
             logger.error(f"Error fetching contact counts: {e}")
             return {}
     
-    async def get_opportunities_by_account(self, account_id: str) -> List[Opportunity]:
-        """Fetch all opportunities for a specific account"""
-        sf = self._get_client()
-        
-        query = f"""
-            SELECT Id, Name, Amount, StageName, CloseDate,
-                   IsWon, IsClosed, AccountId, CreatedDate
-            FROM Opportunity
-            WHERE AccountId = '{account_id}'
-            AND IsDeleted = false
-        """
+    async def iter_opportunities_by_account(self, account_id: str) -> AsyncIterator[Opportunity]:
+        """Stream opportunities for a specific account"""
+        query = _OPPORTUNITIES_BY_ACCOUNT_SOQL.format(_esc(account_id))
         
         try:
-            result = sf.query_all(query)
-            opportunities = [
-                Opportunity(
-                    id=record['Id'],
-                    name=record['Name'],
-                    amount=record.get('Amount'),
-                    stage=record['StageName'],
-                    close_date=datetime.fromisoformat(record['CloseDate'])
-                    if record.get('CloseDate') else None,
-                    is_won=record.get('IsWon', False),
-                    is_closed=record.get('IsClosed', False),
-                    account_id=record['AccountId'],
-                    created_at=datetime.fromisoformat(record['CreatedDate'].replace('Z', '+00:00'))
-                    if record.get('CreatedDate') else None
-                )
-                for record in result.get('records', [])
-            ]
-            return opportunities
+            async for record in self._iter_records(query):
+                yield self._to_opportunity(record)
         except SalesforceError as e:
             logger.error(f"Error fetching opportunities for account {account_id}: {e}")
             raise
 
+    async def get_opportunities_by_account(self, account_id: str) -> List[Opportunity]:
+        """Fetch all opportunities for a specific account; prefer get_opportunities_for_accounts for several"""
+        opportunities = await self.get_opportunities_for_accounts([account_id])
+        return opportunities.get(account_id, [])
+
+    async def _query_by_account_ids(self, soql: str, account_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """Run a query with an AccountId IN (...) filter, one concurrent request per chunk of ids"""
+        sf = await self._ensure_client()
+        # Sorted so the same id set always produces the same chunks and query text
+        ids = sorted(set(account_ids))
+        results = await asyncio.gather(*(
+            self._run(sf.query_all, soql.format(_in_list(chunk)))
+            for chunk in _chunk(ids, self.IN_CLAUSE_CHUNK_SIZE)
+        ))
+        return [record for result in results for record in result.get('records', [])]
+
+    async def get_contacts_for_accounts(self, account_ids: Sequence[str]) -> Dict[str, List[Contact]]:
+        """Fetch contacts for many accounts at once, grouped by account ID"""
+        try:
+            records = await self._query_by_account_ids(_CONTACTS_BY_ACCOUNTS_SOQL, account_ids)
+            contacts: Dict[str, List[Contact]] = {}
+            for record in records:
+                contacts.setdefault(record['AccountId'], []).append(self._to_contact(record))
+            logger.info(f"Fetched {len(records)} contacts for {len(contacts)} accounts")
+            return contacts
+        except SalesforceError as e:
+            logger.error(f"Error fetching contacts for {len(account_ids)} accounts: {e}")
+            raise
+
+    async def get_opportunities_for_accounts(self, account_ids: Sequence[str]) -> Dict[str, List[Opportunity]]:
+        """Fetch opportunities for many accounts at once, grouped by account ID"""
+        try:
+            records = await self._query_by_account_ids(_OPPORTUNITIES_BY_ACCOUNTS_SOQL, account_ids)
+            opportunities: Dict[str, List[Opportunity]] = {}
+            for record in records:
+                opportunities.setdefault(record['AccountId'], []).append(self._to_opportunity(record))
+            logger.info(f"Fetched {len(records)} opportunities for {len(opportunities)} accounts")
+            return opportunities
+        except SalesforceError as e:
+            logger.error(f"Error fetching opportunities for {len(account_ids)} accounts: {e}")
+            raise
+
+    async def _query_grouped_by_account(self, soql: str) -> List[Dict[str, Any]]:
+        """Run an aggregate query grouped by AccountId, paging past the 2000-row cap"""
+        sf = await self._ensure_client()
+        limit = self.AGGREGATE_ROW_LIMIT
+        rows: List[Dict[str, Any]] = []
+        after = ""
+        while True:
+            result = await self._run(sf.query, soql.format(after=after, limit=limit))
+            page = result.get('records', [])
+            if len(page) < limit:
+                rows.extend(page)
+                return rows
+
+            # The last account's groups may run onto the next page, so re-read it there
+            last_account = page[-1]['AccountId']
+            complete = [row for row in page if row['AccountId'] != last_account]
+            if not complete:
+                logger.warning(f"Account {last_account} has {limit}+ groups; result truncated")
+                rows.extend(page)
+                return rows
+            rows.extend(complete)
+            after = f" AND AccountId >= '{_esc(last_account)}'"
+
+    @cached(OPPORTUNITY_SUMMARY_CACHE_KEY, ttl=AGGREGATE_CACHE_TTL, stale=AGGREGATE_CACHE_STALE)
     async def get_opportunity_summary(self) -> Dict[str, Dict[str, Any]]:
         """
         Get opportunity summary grouped by account
         Returns: {account_id: {open_opps, closed_won, closed_lost, pipeline_value}}
         Open = any stage EXCEPT 'Closed Won' or 'Closed Lost'
         """
-        sf = self._get_client()
-    
-        # Query all opportunities (non-aggregate) - this supports pagination
-        query = """
-            SELECT Id, AccountId, Amount, StageName
-            FROM Opportunity
-            WHERE AccountId != null
-        """
-    
         try:
-            result = sf.query_all(query)
-            opportunities = result.get('records', [])
-            logger.info(f"Fetched {len(opportunities)} opportunities from Salesforce")
-    
-            # Aggregate in Python
-            summary = {}
-    
-            for opp in opportunities:
-                account_id = opp.get('AccountId')
-                if not account_id:
-                    continue
-    
-                if account_id not in summary:
-                    summary[account_id] = {
+            # Salesforce sums per (account, stage); only the stage buckets are folded here
+            groups = await self._query_grouped_by_account(_OPPORTUNITY_SUMMARY_SOQL)
+            summary: Dict[str, Dict[str, Any]] = {}
+
+            for group in groups:
+                account_summary = summary.get(group['AccountId'])
+                if account_summary is None:
+                    account_summary = summary[group['AccountId']] = {
                         'open_opps': 0,
                         'pipeline_value': 0,
                         'closed_won': 0,
                         'closed_lost': 0
                     }
-    
-                stage_name = opp.get('StageName', '')
-                amount = opp.get('Amount') or 0
-    
-                # Open = any stage except Closed Won or Closed Lost
-                if stage_name == 'Closed Won':
-                    summary[account_id]['closed_won'] += 1
-                elif stage_name == 'Closed Lost':
-                    summary[account_id]['closed_lost'] += 1
+
+                bucket = _CLOSED_STAGE_BUCKETS.get(group.get('StageName'))
+                if bucket:
+                    account_summary[bucket] += group['cnt']
                 else:
-                    # Any other stage is considered "open"
-                    summary[account_id]['open_opps'] += 1
-                    summary[account_id]['pipeline_value'] += amount
-    
-            logger.info(f"Aggregated opportunities for {len(summary)} accounts")
+                    account_summary['open_opps'] += group['cnt']
+                    account_summary['pipeline_value'] += group.get('amt') or 0
+
+            logger.info(f"Aggregated {len(groups)} opportunity groups for {len(summary)} accounts")
             return summary
-    
+
         except SalesforceError as e:
             logger.error(f"Error fetching opportunity summary: {e}")
             return {}
-            
+
     async def search_accounts_by_domain(self, domain: str) -> List[Dict[str, Any]]:
         """Search for accounts by website domain"""
-        sf = self._get_client()
+        sf = await self._ensure_client()
         
-        query = f"""
-            SELECT Id, Name, Website, Industry, NumberOfEmployees, AnnualRevenue
-            FROM Account
-            WHERE Website LIKE '%{domain}%'
-            AND IsDeleted = false
-        """
+        query = _ACCOUNTS_BY_DOMAIN_SOQL.format(_esc_like(domain))
         
         try:
-            result = sf.query_all(query)
+            result = await self._run(sf.query_all, query)
             return result.get('records', [])
         except SalesforceError as e:
             logger.error(f"Error searching accounts by domain {domain}: {e}")
@@ -231,19 +648,13 @@ class SalesforceClient:
 
     async def get_recently_modified_accounts(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get accounts modified in the last N days"""
-        sf = self._get_client()
+        sf = await self._ensure_client()
         cutoff_date = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%SZ')
         
-        query = f"""
-            SELECT Id, Name, Website, Industry, LastModifiedDate
-            FROM Account
-            WHERE LastModifiedDate >= {cutoff_date}
-            AND IsDeleted = false
-            ORDER BY LastModifiedDate DESC
-        """
+        query = _RECENTLY_MODIFIED_ACCOUNTS_SOQL.format(cutoff_date)
         
         try:
-            result = sf.query_all(query)
+            result = await self._run(sf.query_all, query)
             return result.get('records', [])
         except SalesforceError as e:
             logger.error(f"Error fetching recently modified accounts: {e}")
@@ -252,11 +663,15 @@ class SalesforceClient:
 
 # Singleton instance
 _salesforce_client: Optional[SalesforceClient] = None
+_salesforce_client_lock = threading.Lock()
 
 
 def get_salesforce_client() -> SalesforceClient:
     """Get or create Salesforce client singleton"""
     global _salesforce_client
     if _salesforce_client is None:
-        _salesforce_client = SalesforceClient()
+        # Sync dependencies run in FastAPI's threadpool, so guard construction
+        with _salesforce_client_lock:
+            if _salesforce_client is None:
+                _salesforce_client = SalesforceClient()
     return _salesforce_client
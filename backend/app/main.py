@@ -4,11 +4,16 @@ Account-Based Marketing Dashboard API
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
 import logging
 
+from .cache import close_cache
 from .config import get_settings
+from .integrations import get_hubspot_client, get_factors_client, get_linkedin_client, get_salesforce_client
 from .routers import accounts
+from .services import get_aggregator
 
 # Configure logging
 logging.basicConfig(
@@ -17,6 +22,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Settings don't change after startup, so the status payloads are built once
+_integration_status: Optional[Dict[str, Any]] = None
+_health_status: Optional[Dict[str, Any]] = None
+
+
+def _get_integration_status() -> Dict[str, Any]:
+    """Get the integration status snapshot, building it on first use"""
+    global _integration_status, _health_status
+    if _integration_status is None:
+        settings = get_settings()
+        _integration_status = {
+            "salesforce": {
+                "configured": bool(settings.SFDC_USERNAME and settings.SFDC_PASSWORD),
+                "domain": settings.SFDC_DOMAIN
+            },
+            "hubspot": {
+                "configured": bool(settings.HUBSPOT_ACCESS_TOKEN),
+            },
+            "linkedin": {
+                "configured": bool(settings.LINKEDIN_ACCESS_TOKEN),
+                "organization_id": settings.LINKEDIN_ORGANIZATION_ID,
+                "ad_account_id": settings.LINKEDIN_AD_ACCOUNT_ID
+            },
+            "factors": {
+                "configured": bool(settings.FACTORS_API_KEY),
+                "project_id": settings.FACTORS_PROJECT_ID
+            }
+        }
+        _health_status = {
+            "status": "healthy",
+            "integrations": {name: status["configured"] for name, status in _integration_status.items()}
+        }
+    return _integration_status
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -25,9 +64,25 @@ async def lifespan(app: FastAPI):
     logger.info("Starting ABM Reporter API...")
     settings = get_settings()
     logger.info(f"Running in {'debug' if settings.DEBUG else 'production'} mode")
+    _get_integration_status()
+
+    # Create clients before serving so the first requests don't race to build them
+    get_linkedin_client()
+    get_aggregator()
+    sfdc = get_salesforce_client()
+    if settings.SFDC_USERNAME and settings.SFDC_PASSWORD:
+        try:
+            await sfdc.connect()
+        except Exception as e:
+            logger.warning(f"Salesforce login at startup failed, will retry on first use: {e}")
     yield
     # Shutdown
     logger.info("Shutting down ABM Reporter API...")
+    await get_hubspot_client().aclose()
+    await get_factors_client().aclose()
+    await get_linkedin_client().aclose()
+    await get_salesforce_client().aclose()
+    await close_cache()
 
 
 # Create FastAPI application
@@ -49,7 +104,8 @@ app = FastAPI(
     - Multi-channel touchpoint visibility
     """,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS - allow all origins
@@ -79,45 +135,14 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    settings = get_settings()
-
-    # Check which integrations are configured
-    integrations = {
-        "salesforce": bool(settings.SFDC_USERNAME and settings.SFDC_PASSWORD),
-        "hubspot": bool(settings.HUBSPOT_ACCESS_TOKEN),
-        "linkedin": bool(settings.LINKEDIN_ACCESS_TOKEN),
-        "factors": bool(settings.FACTORS_API_KEY),
-    }
-
-    return {
-        "status": "healthy",
-        "integrations": integrations
-    }
+    _get_integration_status()
+    return _health_status
 
 
 @app.get("/api/v1/integrations/status")
 async def get_integration_status():
     """Get status of all integrations"""
-    settings = get_settings()
-
-    return {
-        "salesforce": {
-            "configured": bool(settings.SFDC_USERNAME and settings.SFDC_PASSWORD),
-            "domain": settings.SFDC_DOMAIN
-        },
-        "hubspot": {
-            "configured": bool(settings.HUBSPOT_ACCESS_TOKEN),
-        },
-        "linkedin": {
-            "configured": bool(settings.LINKEDIN_ACCESS_TOKEN),
-            "organization_id": settings.LINKEDIN_ORGANIZATION_ID,
-            "ad_account_id": settings.LINKEDIN_AD_ACCOUNT_ID
-        },
-        "factors": {
-            "configured": bool(settings.FACTORS_API_KEY),
-            "project_id": settings.FACTORS_PROJECT_ID
-        }
-    }
+    return _get_integration_status()
 
 
 if __name__ == "__main__":
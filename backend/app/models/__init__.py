@@ -1,4 +1,4 @@
 """ABM Reporter Data Models"""
-from .account import AccountEngagement, AccountList, AccountFilter, Contact, Opportunity
+from .account import AccountEngagement, AccountRow, AccountList, AccountFilter, Contact, Opportunity
 
-__all__ = ['AccountEngagement', 'AccountList', 'AccountFilter', 'Contact', 'Opportunity']
+__all__ = ['AccountEngagement', 'AccountRow', 'AccountList', 'AccountFilter', 'Contact', 'Opportunity']
@@ -2,7 +2,7 @@
 ABM Reporter - Account Data Models
 Defines the core data structures for ABM reporting
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -22,6 +22,8 @@ class OpportunityStage(str, Enum):
 
 class Contact(BaseModel):
     """Contact from CRM"""
+    model_config = ConfigDict(frozen=True)
+
     id: str
     email: Optional[str] = None
     first_name: Optional[str] = None
@@ -34,6 +36,8 @@ class Contact(BaseModel):
 
 class Opportunity(BaseModel):
     """Salesforce Opportunity"""
+    model_config = ConfigDict(frozen=True)
+
     id: str
     name: str
     amount: Optional[float] = None
@@ -82,12 +86,10 @@ class AccountEngagement(BaseModel):
     # Contact metrics
     sfdc_contacts: int = 0
     hubspot_contacts: int = 0
-    total_contacts: int = 0
 
     # LinkedIn metrics
     linkedin_organic_impressions: int = 0
     linkedin_ad_impressions: int = 0
-    linkedin_total_impressions: int = 0
     linkedin_engagement_rate: float = 0.0
 
     # Website metrics
@@ -116,6 +118,17 @@ class AccountEngagement(BaseModel):
     # Timestamps
     last_updated: datetime = Field(default_factory=datetime.utcnow)
 
+    # Totals are derived so they can't drift from their parts
+    @computed_field
+    @property
+    def total_contacts(self) -> int:
+        return self.sfdc_contacts + self.hubspot_contacts
+
+    @computed_field
+    @property
+    def linkedin_total_impressions(self) -> int:
+        return self.linkedin_organic_impressions + self.linkedin_ad_impressions
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -137,6 +150,24 @@ class AccountEngagement(BaseModel):
         }
 
 
+class AccountRow(BaseModel):
+    """Account list row: the columns the dashboard table shows, filters on and sorts by"""
+    account_name: str
+    domains: List[str] = Field(default_factory=list)
+    industry: Optional[str] = None
+    sfdc_contacts: int = 0
+    hubspot_contacts: int = 0
+    total_contacts: int = 0
+    linkedin_organic_impressions: int = 0
+    linkedin_ad_impressions: int = 0
+    website_sessions: int = 0
+    form_submissions: int = 0
+    open_opportunities: int = 0
+    closed_won: int = 0
+    closed_lost: int = 0
+    pipeline_value: float = 0.0
+
+
 class AccountList(BaseModel):
     """List of accounts for API response"""
     accounts: List[AccountEngagement]
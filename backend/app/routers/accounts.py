@@ -1,11 +1,14 @@
 """
 ABM Reporter - Account API Routes
 """
-from fastapi import APIRouter, Depends, Query, HTTPException, UploadFile, File
-from typing import Optional, List, Any
+from fastapi import APIRouter, Depends, Query, HTTPException, UploadFile, File, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Any, Iterator
 from datetime import datetime, timedelta
+import hashlib
+import orjson
 from pydantic import BaseModel
-from ..models.account import AccountEngagement, AccountList, AccountFilter
+from ..models.account import AccountEngagement, AccountRow, AccountList, AccountFilter
 from ..services.aggregator import get_aggregator, ABMDataAggregator
 from ..integrations.csv_handler import get_csv_handler
 
@@ -14,15 +17,32 @@ router = APIRouter(prefix="/accounts", tags=["accounts"])
 
 class AccountListWithSummary(BaseModel):
     """Account list with summary statistics"""
-    accounts: List[AccountEngagement]
+    accounts: List[AccountRow]
     total_count: int
     last_synced: datetime
     # Summary stats from ALL accounts (not just paginated)
     summary: dict
 
 
+# List responses carry only the row columns; the full account is on the detail endpoint
+_ROW_FIELDS = tuple(AccountRow.model_fields)
+
+
+def _row_values(account: AccountEngagement) -> dict:
+    """Pick an account's list-row columns, in AccountRow's field order"""
+    return {field: getattr(account, field) for field in _ROW_FIELDS}
+
+
+def _iter_ndjson(accounts: List[AccountEngagement]) -> Iterator[bytes]:
+    """Serialize account rows one JSON line at a time"""
+    for account in accounts:
+        yield orjson.dumps(_row_values(account)) + b"\n"
+
+
 @router.get("/", response_model=AccountListWithSummary)
 async def get_accounts(
+        request: Request,
+        response: Response,
         search: Optional[str] = Query(None, description="Search by account name or domain"),
         min_pipeline: Optional[float] = Query(None, description="Minimum pipeline value"),
         max_pipeline: Optional[float] = Query(None, description="Maximum pipeline value"),
@@ -34,6 +54,7 @@ async def get_accounts(
         page: int = Query(1, ge=1, description="Page number"),
         page_size: int = Query(50, ge=1, le=100, description="Page size"),
         refresh: bool = Query(False, description="Force refresh data"),
+        stream: bool = Query(False, description="Stream the page as NDJSON, one account per line, without summary"),
         aggregator: ABMDataAggregator = Depends(get_aggregator)
 ):
     """
@@ -59,32 +80,43 @@ async def get_accounts(
     # Get aggregated data
     all_data = await aggregator.aggregate_account_data(force_refresh=refresh)
     
-    # Calculate summary stats from ALL accounts BEFORE pagination
     all_accounts = all_data.accounts
-    total_pipeline = sum(a.pipeline_value for a in all_accounts)
-    total_contacts = sum(a.total_contacts for a in all_accounts)
-    total_sfdc_contacts = sum(a.sfdc_contacts for a in all_accounts)
-    total_hubspot_contacts = sum(a.hubspot_contacts for a in all_accounts)
-    total_sessions = sum(a.website_sessions for a in all_accounts)
-    total_submissions = sum(a.form_submissions for a in all_accounts)
-    accounts_with_opps = len([a for a in all_accounts if a.open_opportunities > 0])
+
+    # Same data snapshot + same query = same body, so a polling client can skip the download
+    etag = '"{}"'.format(hashlib.blake2b(
+        f"{all_data.last_synced}:{stream}:{filters.model_dump_json()}".encode(), digest_size=16
+    ).hexdigest())
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if stream:
+        return StreamingResponse(
+            _iter_ndjson(aggregator.filter_accounts(all_accounts, filters)),
+            media_type="application/x-ndjson",
+            headers={"ETag": etag}
+        )
+    response.headers["ETag"] = etag
+
+    # Calculate summary stats from ALL accounts BEFORE pagination
+    totals = aggregator.get_cached_summary()
     
     # Apply filters (includes pagination)
     filtered_accounts = aggregator.filter_accounts(all_accounts, filters)
     
     return AccountListWithSummary(
-        accounts=filtered_accounts,
+        # Values come from already-validated accounts, so rows skip validation
+        accounts=[AccountRow.model_construct(**_row_values(a)) for a in filtered_accounts],
         total_count=len(all_accounts),
         last_synced=all_data.last_synced,
         summary={
             "total_accounts": len(all_accounts),
-            "total_pipeline": total_pipeline,
-            "total_contacts": total_contacts,
-            "total_sfdc_contacts": total_sfdc_contacts,
-            "total_hubspot_contacts": total_hubspot_contacts,
-            "total_website_sessions": total_sessions,
-            "total_form_submissions": total_submissions,
-            "accounts_with_open_opportunities": accounts_with_opps
+            "total_pipeline": totals["total_pipeline"],
+            "total_contacts": totals["total_contacts"],
+            "total_sfdc_contacts": totals["total_sfdc_contacts"],
+            "total_hubspot_contacts": totals["total_hubspot_contacts"],
+            "total_website_sessions": totals["total_website_sessions"],
+            "total_form_submissions": totals["total_form_submissions"],
+            "accounts_with_open_opportunities": totals["accounts_with_open_opportunities"]
         }
     )
 
@@ -97,11 +129,11 @@ async def get_account_detail(
     """
     Get detailed data for a specific account
     """
-    all_data = await aggregator.aggregate_account_data()
+    await aggregator.aggregate_account_data()
     
-    for account in all_data.accounts:
-        if account.account_name.lower() == account_name.lower():
-            return account
+    account = aggregator.get_account_by_name(account_name)
+    if account is not None:
+        return account
     
     raise HTTPException(status_code=404, detail=f"Account '{account_name}' not found")
 
@@ -149,8 +181,8 @@ async def upload_fibbler_data(
     csv_handler = get_csv_handler()
     
     try:
-        content = await file.read()
-        data = csv_handler.parse_fibbler_csv(content)
+        # Parse straight from the spooled upload rather than copying it into memory first
+        data = csv_handler.parse_fibbler_csv(file.file)
         return {
             "message": f"Successfully parsed {len(data)} accounts from Fibbler export",
             "accounts": data[:10]
@@ -172,8 +204,8 @@ async def upload_linkedin_ads_data(
     csv_handler = get_csv_handler()
     
     try:
-        content = await file.read()
-        data = csv_handler.parse_linkedin_ads_csv(content)
+        # Parse straight from the spooled upload rather than copying it into memory first
+        data = csv_handler.parse_linkedin_ads_csv(file.file)
         return {
             "message": f"Successfully parsed {len(data)} records from LinkedIn Ads export",
             "records": data[:10]
@@ -208,25 +240,18 @@ async def get_summary_stats(
     """
     data = await aggregator.aggregate_account_data()
 
-    total_pipeline = sum(a.pipeline_value for a in data.accounts)
-    total_contacts = sum(a.total_contacts for a in data.accounts)
-    total_sessions = sum(a.website_sessions for a in data.accounts)
-    total_submissions = sum(a.form_submissions for a in data.accounts)
-    accounts_with_opps = len([a for a in data.accounts if a.open_opportunities > 0])
-    total_open_opps = sum(a.open_opportunities for a in data.accounts)
-    total_closed_won = sum(a.closed_won for a in data.accounts)
-    total_closed_lost = sum(a.closed_lost for a in data.accounts)
+    totals = aggregator.get_cached_summary()
 
     return {
         "total_accounts": data.total_count,
-        "total_pipeline": total_pipeline,
-        "total_contacts": total_contacts,
-        "total_website_sessions": total_sessions,
-        "total_form_submissions": total_submissions,
-        "accounts_with_open_opportunities": accounts_with_opps,
-        "total_open_opportunities": total_open_opps,
-        "total_closed_won": total_closed_won,
-        "total_closed_lost": total_closed_lost,
-        "avg_contacts_per_account": total_contacts / data.total_count if data.total_count > 0 else 0,
+        "total_pipeline": totals["total_pipeline"],
+        "total_contacts": totals["total_contacts"],
+        "total_website_sessions": totals["total_website_sessions"],
+        "total_form_submissions": totals["total_form_submissions"],
+        "accounts_with_open_opportunities": totals["accounts_with_open_opportunities"],
+        "total_open_opportunities": totals["total_open_opportunities"],
+        "total_closed_won": totals["total_closed_won"],
+        "total_closed_lost": totals["total_closed_lost"],
+        "avg_contacts_per_account": totals["total_contacts"] / data.total_count if data.total_count > 0 else 0,
         "last_synced": data.last_synced
     }
@@ -0,0 +1,150 @@
+"""
+ABM Reporter - Columnar Account Table
+Column-wise snapshot of aggregated accounts for vectorized filtering and sorting
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..models.account import AccountEngagement, AccountFilter
+
+# Numeric columns the filters, sorts and summary read; None is stored as 0
+_NUMERIC_COLUMNS = {
+    'pipeline_value': np.float64,
+    'total_contacts': np.int64,
+    'sfdc_contacts': np.int64,
+    'hubspot_contacts': np.int64,
+    'open_opportunities': np.int64,
+    'closed_won': np.int64,
+    'closed_lost': np.int64,
+    'website_sessions': np.int64,
+    'form_submissions': np.int64,
+    'linkedin_total_impressions': np.int64,
+    'intent_score': np.int64,
+}
+
+
+class AccountTable:
+    """Read-only column store over an account list; rows are addressed by list index"""
+
+    def __init__(self, accounts: List[AccountEngagement], names_lower: Optional[List[str]] = None):
+        """names_lower, when the caller already has it, must line up with accounts"""
+        self.accounts = accounts
+        n = len(accounts)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.fromiter((getattr(a, name) or 0 for a in accounts), dtype=dtype, count=n)
+            for name, dtype in _NUMERIC_COLUMNS.items()
+        }
+
+        # Industries as integer codes so membership tests run on an int column
+        self._industry_codes: Dict[Optional[str], int] = {}
+        self.industry = np.fromiter(
+            (self._industry_codes.setdefault(a.industry, len(self._industry_codes)) for a in accounts),
+            dtype=np.int64, count=n
+        )
+
+        self.names_lower = names_lower if names_lower is not None else [a.account_name.lower() for a in accounts]
+        # Name and domains in one NUL-separated string, so search is a single substring test per row
+        self.search_text = [
+            "\0".join([name, *(d.lower() for d in a.domains)]) for name, a in zip(self.names_lower, accounts)
+        ]
+        self._name_rank: Optional[np.ndarray] = None
+        self._industry_rows: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def summary(self) -> Dict[str, Any]:
+        """Total the summary metrics with one vectorized reduction per column"""
+        cols = self.columns
+        return {
+            "total_pipeline": float(cols['pipeline_value'].sum()),
+            "total_contacts": int(cols['total_contacts'].sum()),
+            "total_sfdc_contacts": int(cols['sfdc_contacts'].sum()),
+            "total_hubspot_contacts": int(cols['hubspot_contacts'].sum()),
+            "total_website_sessions": int(cols['website_sessions'].sum()),
+            "total_form_submissions": int(cols['form_submissions'].sum()),
+            "accounts_with_open_opportunities": int(np.count_nonzero(cols['open_opportunities'] > 0)),
+            "total_open_opportunities": int(cols['open_opportunities'].sum()),
+            "total_closed_won": int(cols['closed_won'].sum()),
+            "total_closed_lost": int(cols['closed_lost'].sum()),
+        }
+
+    def _sort_column(self, sort_by: str) -> np.ndarray:
+        """Get the column to sort by, defaulting to pipeline value"""
+        if sort_by == 'account_name':
+            if self._name_rank is None:
+                # Rank names once so name sorts run on integers
+                _, self._name_rank = np.unique(np.array(self.names_lower, dtype=object), return_inverse=True)
+            return self._name_rank
+        return self.columns.get(sort_by, self.columns['pipeline_value'])
+
+    def _rows_for_industry(self, code: int) -> np.ndarray:
+        """Get the row indices with an industry code, from an inverted index built on first use"""
+        if self._industry_rows is None:
+            order = np.argsort(self.industry, kind='stable')
+            counts = np.bincount(self.industry, minlength=len(self._industry_codes))
+            self._industry_rows = np.split(order, np.cumsum(counts)[:-1])
+        return self._industry_rows[code]
+
+    def select(self, filters: AccountFilter) -> List[AccountEngagement]:
+        """Filter, sort and paginate the accounts"""
+        cols = self.columns
+        mask = np.ones(len(self), dtype=bool)
+
+        if filters.min_pipeline is not None:
+            mask &= cols['pipeline_value'] >= filters.min_pipeline
+
+        if filters.max_pipeline is not None:
+            mask &= cols['pipeline_value'] <= filters.max_pipeline
+
+        if filters.min_contacts is not None:
+            mask &= cols['total_contacts'] >= filters.min_contacts
+
+        if filters.has_open_opportunities is not None:
+            has_open = cols['open_opportunities'] > 0
+            mask &= has_open if filters.has_open_opportunities else ~has_open
+
+        if filters.industries:
+            in_industry = np.zeros(len(self), dtype=bool)
+            for industry in frozenset(filters.industries):
+                code = self._industry_codes.get(industry)
+                if code is not None:
+                    in_industry[self._rows_for_industry(code)] = True
+            mask &= in_industry
+
+        if filters.min_intent_score is not None:
+            mask &= cols['intent_score'] >= filters.min_intent_score
+
+        rows = np.flatnonzero(mask)
+
+        if filters.search_query:
+            query = filters.search_query.lower()
+            if "\0" in query:
+                rows = rows[:0]  # can only match across the separators
+            else:
+                text = self.search_text
+                rows = np.fromiter((i for i in rows.tolist() if query in text[i]), dtype=np.intp)
+
+        start = (filters.page - 1) * filters.page_size
+        end = start + filters.page_size
+
+        key = self._sort_column(filters.sort_by)[rows]
+        if filters.sort_order == 'desc':
+            key = -key
+
+        if 0 < end and 2 * end < len(rows):
+            # Only the first `end` rows are needed: keep those below the end-th key plus enough
+            # ties, earliest first, so sorting just them matches the full stable sort
+            kth = np.partition(key, end - 1)[end - 1]
+            keep = key < kth
+            ties = np.flatnonzero(key == kth)[:end - np.count_nonzero(keep)]
+            keep[ties] = True
+            rows, key = rows[keep], key[keep]
+
+        # Stable sort on the negated key keeps ties in list order, like sorted(reverse=True)
+        rows = rows[np.argsort(key, kind='stable')]
+
+        # Paginate
+        accounts = self.accounts
+        return [accounts[i] for i in rows[start:end].tolist()]
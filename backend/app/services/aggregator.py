@@ -3,11 +3,15 @@ ABM Reporter - Data Aggregation Service
 Combines data from all integrations into unified account-level view
 """
 import logging
-from typing import List, Dict, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import asyncio
+import re
+from collections import Counter
+from functools import lru_cache
 
 from ..models.account import AccountEngagement, AccountList, AccountFilter
+from .account_table import AccountTable
 from ..integrations.salesforce import get_salesforce_client
 from ..integrations.hubspot import get_hubspot_client
 from ..integrations.linkedin import get_linkedin_client
@@ -15,6 +19,9 @@ from ..integrations.factors import get_factors_client
 
 logger = logging.getLogger(__name__)
 
+# Host of a website URL minus scheme and leading www.; possessive, so a bare 'https://' isn't a host
+_DOMAIN_RE = re.compile(r'^(?:https?://)?+(?:www\.)?+([^/]+)', re.I)
+
 
 class ABMDataAggregator:
     """
@@ -31,19 +38,53 @@ class ABMDataAggregator:
         self._cache: Dict[str, Any] = {}
         self._cache_timestamp: Optional[datetime] = None
         self._cache_ttl = timedelta(minutes=5)
-
-    def _is_cache_valid(self) -> bool:
-        """Check if cache is still valid"""
-        if not self._cache_timestamp:
-            return False
-        return datetime.utcnow() - self._cache_timestamp < self._cache_ttl
+        # Past the TTL, cached data is still served for this long while a background refresh runs
+        self._cache_stale_ttl = timedelta(minutes=15)
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Per-source fetch cache, so a refresh only re-fetches the sources that have expired
+        # source -> (fetched at, date window or None, data)
+        self._source_cache: Dict[str, Tuple[datetime, Any, Dict[str, Any]]] = {}
+        self._source_ttls = {
+            'sfdc': timedelta(minutes=60),
+            'hubspot': timedelta(minutes=30),
+            'linkedin': timedelta(minutes=15),
+            'factors': timedelta(minutes=15),
+        }
+
+    def _cache_age(self) -> Optional[timedelta]:
+        """Get the age of the cached aggregate, or None if there isn't one"""
+        if not self._cache_timestamp or 'aggregated' not in self._cache:
+            return None
+        return datetime.utcnow() - self._cache_timestamp
+
+    async def _fetch_cached(
+            self,
+            source: str,
+            window: Any,
+            fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Get a source's data from the per-source cache, fetching it when missing, expired or for another window"""
+        now = datetime.utcnow()
+        entry = self._source_cache.get(source)
+        if entry is not None and entry[1] == window and now - entry[0] < self._source_ttls[source]:
+            return entry[2]
+
+        data = await fetch()
+        # Failed fetches come back as empty defaults; don't hold on to those for the whole TTL
+        if any(data.values()):
+            self._source_cache[source] = (now, window, data)
+        return data
 
     async def _fetch_salesforce_data(self) -> Dict[str, Any]:
         """Fetch all Salesforce data"""
         try:
-            accounts = await self.sfdc.get_accounts()
-            contact_counts = await self.sfdc.get_contacts_count_by_account()
-            opp_summary = await self.sfdc.get_opportunity_summary()
+            # Independent queries - run the round-trips concurrently
+            accounts, contact_counts, opp_summary = await asyncio.gather(
+                self.sfdc.get_accounts(),
+                self.sfdc.get_contacts_count_by_account(),
+                self.sfdc.get_opportunity_summary()
+            )
 
             return {
                 'accounts': accounts,
@@ -76,7 +117,7 @@ class ABMDataAggregator:
         """Fetch LinkedIn data"""
         try:
             organic_stats = await self.linkedin.get_organization_page_statistics(start_date, end_date)
-            ad_analytics = await self.linkedin.get_ad_analytics(start_date, end_date)
+            ad_analytics = await self.linkedin.get_active_ad_analytics(start_date, end_date)
 
             return {
                 'organic_stats': organic_stats,
@@ -108,54 +149,78 @@ class ABMDataAggregator:
     ) -> AccountList:
         """
         Aggregate data from all sources into unified account view
+        Stale cached data is returned immediately while a background task refreshes it
         """
+        if force_refresh:
+            self._source_cache.clear()
+            await asyncio.gather(
+                self.sfdc.invalidate_cache(),
+                self.hubspot.invalidate_cache(),
+                self.linkedin.invalidate_cache(),
+                self.factors.invalidate_cache()
+            )
+            return await self._refresh(start_date, end_date)
+
         # Check cache
-        if not force_refresh and self._is_cache_valid() and 'aggregated' in self._cache:
-            logger.info("Returning cached aggregated data")
+        age = self._cache_age()
+        if age is not None and age < self._cache_stale_ttl:
+            if age >= self._cache_ttl and (self._refresh_task is None or self._refresh_task.done()):
+                logger.info("Cached aggregated data is stale, refreshing in the background")
+                self._refresh_task = asyncio.create_task(self._background_refresh())
+            else:
+                logger.info("Returning cached aggregated data")
             return self._cache['aggregated']
 
+        return await self._refresh(start_date, end_date)
+
+    async def _background_refresh(self):
+        """Refresh the cached aggregate, logging rather than raising failures"""
+        try:
+            await self._refresh()
+        except Exception as e:
+            logger.error(f"Background aggregate refresh failed: {e}")
+
+    async def _refresh(
+            self,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None
+    ) -> AccountList:
+        """Fetch and merge data from all sources and replace the cached aggregate"""
         # Set date range
         if not end_date:
             end_date = datetime.utcnow()
         if not start_date:
             start_date = end_date - timedelta(days=30)
 
-        # Fetch data from all sources in parallel
-        sfdc_task = self._fetch_salesforce_data()
-        hubspot_task = self._fetch_hubspot_data()
-        linkedin_task = self._fetch_linkedin_data(start_date, end_date)
-        factors_task = self._fetch_factors_data(start_date, end_date)
-
+        # Fetch data from all sources in parallel; each fetch logs its own failure and returns empty data
+        # Date-ranged sources are cached per day window
+        window = (start_date.date(), end_date.date())
         sfdc_data, hubspot_data, linkedin_data, factors_data = await asyncio.gather(
-            sfdc_task, hubspot_task, linkedin_task, factors_task,
-            return_exceptions=True
+            self._fetch_cached('sfdc', None, self._fetch_salesforce_data),
+            self._fetch_cached('hubspot', None, self._fetch_hubspot_data),
+            self._fetch_cached('linkedin', window, lambda: self._fetch_linkedin_data(start_date, end_date)),
+            self._fetch_cached('factors', window, lambda: self._fetch_factors_data(start_date, end_date))
         )
 
-        # Handle any exceptions
-        if isinstance(sfdc_data, Exception):
-            logger.error(f"Salesforce fetch failed: {sfdc_data}")
-            sfdc_data = {'accounts': [], 'contact_counts': {}, 'opportunity_summary': {}}
-        if isinstance(hubspot_data, Exception):
-            logger.error(f"HubSpot fetch failed: {hubspot_data}")
-            hubspot_data = {'companies': [], 'contact_counts': {}, 'forms': [], 'form_submissions': []}
-        if isinstance(linkedin_data, Exception):
-            logger.error(f"LinkedIn fetch failed: {linkedin_data}")
-            linkedin_data = {'organic_stats': {}, 'ad_analytics': []}
-        if isinstance(factors_data, Exception):
-            logger.error(f"Factors.ai fetch failed: {factors_data}")
-            factors_data = {'identified_accounts': [], 'sessions': {}}
-
-        # Build unified account list
-        accounts = self._merge_account_data(sfdc_data, hubspot_data, linkedin_data, factors_data)
+        # Build unified account list; the merge is CPU-bound, so it runs off the event loop
+        accounts_map = await asyncio.to_thread(
+            self._merge_account_data, sfdc_data, hubspot_data, linkedin_data, factors_data
+        )
 
         result = AccountList(
-            accounts=accounts,
-            total_count=len(accounts),
+            accounts=list(accounts_map.values()),
+            total_count=len(accounts_map),
             last_synced=datetime.utcnow()
         )
+        accounts = result.accounts
+        # The table must wrap result.accounts (the list callers get back) to be reused
+        table = await asyncio.to_thread(AccountTable, accounts, list(accounts_map))
 
         # Update cache
         self._cache['aggregated'] = result
+        self._cache['by_name'] = accounts_map
+        self._cache['table'] = table
+        self._cache['summary'] = table.summary()
         self._cache_timestamp = datetime.utcnow()
 
         logger.info(f"Aggregated data for {len(accounts)} accounts")
@@ -167,11 +232,13 @@ class ABMDataAggregator:
             hubspot_data: Dict[str, Any],
             linkedin_data: Dict[str, Any],
             factors_data: Dict[str, Any]
-    ) -> List[AccountEngagement]:
+    ) -> Dict[str, AccountEngagement]:
         """
         Merge data from all sources into unified account records
+        Returns: {lowercased account name: account}
         """
         accounts_map: Dict[str, AccountEngagement] = {}
+        now = datetime.utcnow()
 
         # Process Salesforce accounts
         for account in sfdc_data.get('accounts', []):
@@ -182,8 +249,9 @@ class ABMDataAggregator:
             # Extract domain from website
             domains = []
             if website:
-                domain = website.replace('http://', '').replace('https://', '').replace('www.', '').split('/')[0]
-                domains.append(domain)
+                match = _DOMAIN_RE.match(website)
+                if match:
+                    domains.append(match.group(1))
 
             # Get contact count
             sfdc_contacts = sfdc_data.get('contact_counts', {}).get(account_id, 0)
@@ -192,25 +260,32 @@ class ABMDataAggregator:
             opp_data = sfdc_data.get('opportunity_summary', {}).get(account_id, {})
 
             key = name.lower()
-            accounts_map[key] = AccountEngagement(
+            annual_revenue = account.get('AnnualRevenue')
+
+            # Values here are already typed, so skip validation and coerce numbers the way it would.
+            # Every field is passed in declaration order, as model_construct keeps the order given
+            accounts_map[key] = AccountEngagement.model_construct(
                 account_name=name,
                 domains=domains,
                 sfdc_contacts=sfdc_contacts,
                 hubspot_contacts=0,
-                total_contacts=sfdc_contacts,
                 linkedin_organic_impressions=0,
                 linkedin_ad_impressions=0,
-                linkedin_total_impressions=0,
+                linkedin_engagement_rate=0.0,
                 website_sessions=0,
+                website_page_views=0,
                 form_submissions=0,
                 current_opportunities=opp_data.get('open_opps', 0) + opp_data.get('closed_won', 0) + opp_data.get('closed_lost', 0),
                 closed_won=opp_data.get('closed_won', 0),
                 closed_lost=opp_data.get('closed_lost', 0),
                 open_opportunities=opp_data.get('open_opps', 0),
-                pipeline_value=opp_data.get('pipeline_value', 0),
+                pipeline_value=float(opp_data.get('pipeline_value', 0)),
                 industry=account.get('Industry'),
                 employee_count=account.get('NumberOfEmployees'),
-                annual_revenue=account.get('AnnualRevenue')
+                annual_revenue=float(annual_revenue) if annual_revenue is not None else None,
+                intent_score=None,
+                intent_topics=[],
+                last_updated=now
             )
 
         # Process HubSpot companies
@@ -227,80 +302,74 @@ class ABMDataAggregator:
                     accounts_map[key].domains.append(domain)
             else:
                 # Create new account
-                accounts_map[key] = AccountEngagement(
+                accounts_map[key] = AccountEngagement.model_construct(
                     account_name=name,
                     domains=[domain] if domain else [],
                     sfdc_contacts=0,
                     hubspot_contacts=0,
-                    total_contacts=0,
                     linkedin_organic_impressions=0,
                     linkedin_ad_impressions=0,
-                    linkedin_total_impressions=0,
+                    linkedin_engagement_rate=0.0,
                     website_sessions=0,
+                    website_page_views=0,
                     form_submissions=0,
                     current_opportunities=0,
                     closed_won=0,
                     closed_lost=0,
                     open_opportunities=0,
-                    pipeline_value=0,
+                    pipeline_value=0.0,
                     industry=props.get('industry'),
                     employee_count=int(props.get('numberofemployees', 0) or 0),
-                    annual_revenue=float(props.get('annualrevenue', 0) or 0)
+                    annual_revenue=float(props.get('annualrevenue', 0) or 0),
+                    intent_score=None,
+                    intent_topics=[],
+                    last_updated=now
                 )
 
             # Update HubSpot contact count
             company_id = company.get('id')
-            hs_contacts = hubspot_data.get('contact_counts', {}).get(company_id, 0)
-            accounts_map[key].hubspot_contacts = hs_contacts
-            accounts_map[key].total_contacts = accounts_map[key].sfdc_contacts + hs_contacts
+            accounts_map[key].hubspot_contacts = hubspot_data.get('contact_counts', {}).get(company_id, 0)
 
         # Process form submissions
-        submissions_by_domain: Dict[str, int] = {}
-        for submission in hubspot_data.get('form_submissions', []):
-            email = submission.contact_email
-            if email:
-                domain = email.split('@')[-1]
-                submissions_by_domain[domain] = submissions_by_domain.get(domain, 0) + 1
-
-        # Match submissions to accounts
-        for key, account in accounts_map.items():
-            for domain in account.domains:
-                if domain in submissions_by_domain:
-                    account.form_submissions += submissions_by_domain[domain]
+        submissions_by_domain = Counter(
+            submission.contact_email.rsplit('@', 1)[-1]
+            for submission in hubspot_data.get('form_submissions', [])
+            if submission.contact_email
+        )
 
-        # Process Factors.ai sessions
-        sessions_data = factors_data.get('sessions', {})
+        # Inverted index: domain -> (account key, position in that account's domains)
+        domain_index: Dict[str, List[Tuple[str, int]]] = {}
         for key, account in accounts_map.items():
-            for domain in account.domains:
-                if domain in sessions_data:
-                    metrics = sessions_data[domain]
-                    account.website_sessions = metrics.sessions
-                    account.website_page_views = metrics.page_views
-                    break
-
-        # Process LinkedIn data (simplified - in reality would need company matching)
-        # LinkedIn data is typically org-level, so we'd need additional mapping
-        organic_stats = linkedin_data.get('organic_stats', {})
-        ad_analytics = linkedin_data.get('ad_analytics', [])
-
-        # For now, aggregate at org level
-        total_organic_impressions = 0
-        total_ad_impressions = 0
-
-        for element in organic_stats.get('elements', []):
-            stats = element.get('totalShareStatistics', {})
-            total_organic_impressions += stats.get('impressionCount', 0)
-
-        for element in ad_analytics:
-            total_ad_impressions += element.get('impressions', 0)
-
-        # Calculate totals
-        for account in accounts_map.values():
-            account.linkedin_total_impressions = (
-                    account.linkedin_organic_impressions + account.linkedin_ad_impressions
-            )
+            for pos, domain in enumerate(account.domains):
+                domain_index.setdefault(domain, []).append((key, pos))
 
-        return list(accounts_map.values())
+        # Match submissions to accounts; every account listing the domain gets its count
+        for domain, count in submissions_by_domain.items():
+            for key, _ in domain_index.get(domain, ()):
+                accounts_map[key].form_submissions += count
+
+        # Process Factors.ai sessions; an account takes the metrics of its first listed domain that has any
+        sessions_data = factors_data.get('sessions', {})
+        matched_sessions: Dict[str, Tuple[int, Any]] = {}
+        for domain, metrics in sessions_data.items():
+            for key, pos in domain_index.get(domain, ()):
+                if key not in matched_sessions or pos < matched_sessions[key][0]:
+                    matched_sessions[key] = (pos, metrics)
+
+        for key, (_, metrics) in matched_sessions.items():
+            account = accounts_map[key]
+            account.website_sessions = metrics.sessions
+            account.website_page_views = metrics.page_views
+
+        # LinkedIn data is org-level, so it isn't attributed to accounts until there's a company mapping
+        return accounts_map
+
+    def _table_for(self, accounts: List[AccountEngagement]) -> AccountTable:
+        """Get the column table for an account list, reusing the one built for the cached result"""
+        table = self._cache.get('table')
+        if table is not None and table.accounts is accounts:
+            return table
+        return AccountTable(accounts)
 
     def filter_accounts(
             self,
@@ -308,66 +377,29 @@ class ABMDataAggregator:
             filters: AccountFilter
     ) -> List[AccountEngagement]:
         """Apply filters to account list"""
-        filtered = accounts
-
-        if filters.min_pipeline is not None:
-            filtered = [a for a in filtered if a.pipeline_value >= filters.min_pipeline]
-
-        if filters.max_pipeline is not None:
-            filtered = [a for a in filtered if a.pipeline_value <= filters.max_pipeline]
-
-        if filters.min_contacts is not None:
-            filtered = [a for a in filtered if a.total_contacts >= filters.min_contacts]
+        return self._table_for(accounts).select(filters)
 
-        if filters.has_open_opportunities is not None:
-            if filters.has_open_opportunities:
-                filtered = [a for a in filtered if a.open_opportunities > 0]
-            else:
-                filtered = [a for a in filtered if a.open_opportunities == 0]
-
-        if filters.industries:
-            filtered = [a for a in filtered if a.industry in filters.industries]
-
-        if filters.min_intent_score is not None:
-            filtered = [a for a in filtered if (a.intent_score or 0) >= filters.min_intent_score]
-
-        if filters.search_query:
-            query = filters.search_query.lower()
-            filtered = [a for a in filtered if query in a.account_name.lower() or
-                        any(query in d.lower() for d in a.domains)]
-
-        # Sort
-        reverse = filters.sort_order == 'desc'
-        sort_key = {
-            'pipeline_value': lambda a: a.pipeline_value,
-            'total_contacts': lambda a: a.total_contacts,
-            'website_sessions': lambda a: a.website_sessions,
-            'form_submissions': lambda a: a.form_submissions,
-            'account_name': lambda a: a.account_name.lower(),
-            'linkedin_total_impressions': lambda a: a.linkedin_total_impressions
-        }.get(filters.sort_by, lambda a: a.pipeline_value)
+    def get_account_by_name(self, account_name: str) -> Optional[AccountEngagement]:
+        """Look up an account in the cached aggregate by case-insensitive name"""
+        return self._cache.get('by_name', {}).get(account_name.lower())
 
-        filtered = sorted(filtered, key=sort_key, reverse=reverse)
-
-        # Paginate
-        start = (filters.page - 1) * filters.page_size
-        end = start + filters.page_size
-
-        return filtered[start:end]
+    def get_cached_summary(self) -> Dict[str, Any]:
+        """Get summary totals for the cached aggregate, computed once per refresh"""
+        if 'summary' not in self._cache:
+            aggregated = self._cache.get('aggregated')
+            if aggregated is None:
+                return AccountTable([]).summary()
+            self._cache['summary'] = self._table_for(aggregated.accounts).summary()
+        return self._cache['summary']
 
     def invalidate_cache(self):
         """Clear the cache"""
         self._cache.clear()
+        self._source_cache.clear()
         self._cache_timestamp = None
 
 
-# Singleton instance
-_aggregator: Optional[ABMDataAggregator] = None
-
-
+@lru_cache(maxsize=1)
 def get_aggregator() -> ABMDataAggregator:
     """Get or create aggregator singleton"""
-    global _aggregator
-    if _aggregator is None:
-        _aggregator = ABMDataAggregator()
-    return _aggregator
+    return ABMDataAggregator()